@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.constants import AUTH_CACHE_STATS_INTERVAL, AUTH_CACHE_TIMEOUT
+
+TOKEN_KEY = 'auth:token:{}'
+USER_KEY = 'auth:user:{}'
+STATS_KEY = 'auth:stats:{}'
+
+
+def get_cached_fields():
+    """Поля пользователя, хранимые в кеше; пароль не кешируется."""
+    return [
+        field for field in get_user_model()._meta.concrete_fields
+        if field.name != 'password'
+    ]
+
+
+def pack_user(user):
+    """Облегчённая запись пользователя для кеша."""
+    return [
+        field.get_prep_value(field.value_from_object(user))
+        for field in get_cached_fields()
+    ]
+
+
+def unpack_user(values):
+    """Пользователь из записи кеша; остальные поля отложены."""
+    fields = get_cached_fields()
+    return get_user_model().from_db(
+        DEFAULT_DB_ALIAS, [field.attname for field in fields], values
+    )
+
+
+def _delete(keys):
+    cache.delete_many(keys)
+
+
+def evict(*keys):
+    """Удаление записей из кеша аутентификации.
+
+    Внутри транзакции записи удаляются повторно после её фиксации, чтобы
+    в кеше не остались данные, прочитанные до фиксации.
+    """
+    _delete(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _delete(keys))
+
+
+def evict_token(key):
+    evict(TOKEN_KEY.format(key))
+
+
+def evict_user(pk):
+    evict(USER_KEY.format(pk))
+
+
+class AuthCacheStats:
+    """Счётчики попаданий и промахов кеша аутентификации.
+
+    Счётчики ведутся в процессе и каждые AUTH_CACHE_STATS_INTERVAL
+    обращений добавляются к общим значениям в кеше.
+    """
+
+    names = ('hits', 'misses')
+
+    def __init__(self):
+        self.pending = dict.fromkeys(self.names, 0)
+
+    def record(self, name):
+        self.pending[name] += 1
+        if sum(self.pending.values()) >= AUTH_CACHE_STATS_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        pending, self.pending = self.pending, dict.fromkeys(self.names, 0)
+        for name, value in pending.items():
+            if not value:
+                continue
+            key = STATS_KEY.format(name)
+            if not cache.add(key, value, timeout=None):
+                cache.incr(key, value)
+
+    def get(self):
+        """Общие значения счётчиков с учётом ещё не сброшенных."""
+        keys = {STATS_KEY.format(name): name for name in self.names}
+        totals = cache.get_many(keys)
+        return {
+            name: totals.get(key, 0) + self.pending[name]
+            for key, name in keys.items()
+        }
+
+    def reset(self):
+        self.pending = dict.fromkeys(self.names, 0)
+        cache.delete_many([STATS_KEY.format(name) for name in self.names])
+
+
+stats = AuthCacheStats()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием токенов и пользователей.
+
+    В кеше хранятся соответствие токена идентификатору пользователя
+    и облегчённая запись пользователя. Записи удаляются сигналами при
+    выходе, изменении и удалении пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        pk = cache.get(TOKEN_KEY.format(key))
+        values = None if pk is None else cache.get(USER_KEY.format(pk))
+        if values is None:
+            stats.record('misses')
+            user, token = self.load_credentials(key)
+        else:
+            stats.record('hits')
+            user = unpack_user(values)
+            token = self.get_model()(key=key, user=user)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user, token
+
+    def load_credentials(self, key):
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        cache.set_many({
+            TOKEN_KEY.format(key): token.user_id,
+            USER_KEY.format(token.user_id): pack_user(token.user),
+        }, AUTH_CACHE_TIMEOUT)
+        return token.user, token
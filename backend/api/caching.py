@@ -0,0 +1,170 @@
+from functools import partial, wraps
+from hashlib import md5
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+from core.cache import get_versions
+from core.constants import RESPONSE_CACHE_TIMEOUT
+from recipes.models import Recipe
+
+CATALOG = 'responses:catalog'
+USERS = 'responses:users'
+USER_STATE = 'responses:user:{}'
+FEED = 'responses:feed'
+RECIPE = 'responses:recipe:{}'
+AUTHOR = 'responses:author:{}'
+TAG = 'responses:tag:{}'
+
+
+def get_list_cache_key(request):
+    """Ключ списка рецептов по нормализованной строке запроса.
+
+    Список с фильтром по автору или тегам зависит только от их версий,
+    остальные списки — от общей версии ленты. Схема и хост входят
+    в ключ: ответ содержит абсолютные ссылки.
+    """
+    params = sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+    )
+    authors = request.query_params.getlist('author')
+    tags = request.query_params.getlist('tags')
+    names = (
+        [AUTHOR.format(author) for author in sorted(set(authors))]
+        + [TAG.format(tag) for tag in sorted(set(tags))]
+        or [FEED]
+    )
+    versions = get_versions(CATALOG, *names)
+    digest = md5(
+        f'{request.build_absolute_uri("/")}|{versions}|{params}'.encode()
+    ).hexdigest()
+    return f'responses:recipes:list:{digest}'
+
+
+def get_recipe_versions(pk):
+    """Версии рецепта для ETag: даты из БД и счётчики автора и каталога."""
+    try:
+        recipe = Recipe.objects.filter(pk=pk).values_list(
+            'created_at', 'updated_at', 'author_id'
+        ).first()
+    except (TypeError, ValueError):
+        return None
+    if recipe is None:
+        return None
+    created_at, updated_at, author_id = recipe
+    return (created_at.isoformat(), updated_at.isoformat(),
+            *get_versions(CATALOG, RECIPE.format(pk),
+                          AUTHOR.format(author_id)))
+
+
+def get_detail_cache_key(request, pk):
+    """Ключ карточки рецепта по версиям, схеме и хосту запроса."""
+    versions = get_versions(CATALOG, RECIPE.format(pk))
+    origin = md5(request.build_absolute_uri('/').encode()).hexdigest()
+    return (f'responses:recipes:detail:{pk}:{origin}:'
+            f'{":".join(map(str, versions))}')
+
+
+class AnonymousCacheMixin:
+    """Кеширование списка и карточки рецептов для анонимных запросов.
+
+    Ответы анонимным пользователям не содержат персональных полей,
+    поэтому их можно отдавать всем из общего кеша. Ключ передаётся
+    CompressionMiddleware, чтобы сжатый ответ тоже брался из кеша.
+    """
+
+    def get_cached_response(self, request, get_key, view, *args, **kwargs):
+        if request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = get_key()
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+        response.compression_cache_key = key
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, lambda: get_list_cache_key(request), super().list,
+            *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request,
+            lambda: get_detail_cache_key(request, kwargs[self.lookup_field]),
+            super().retrieve, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """Поддержка условных GET-запросов для list и retrieve.
+
+    ETag строится из версий данных, которые возвращает
+    `get_etag_versions`, без сериализации ответа. При совпадении
+    с If-None-Match возвращается 304.
+    """
+
+    etag_versions = ()
+
+    def get_etag_versions(self, request, *args, **kwargs):
+        """Версии данных, от которых зависит ответ.
+
+        None отключает условную обработку запроса.
+        """
+        names = list(self.etag_versions)
+        if request.user.is_authenticated:
+            names.append(USER_STATE.format(request.user.pk))
+        return get_versions(*names)
+
+    def get_etag(self, request, *args, **kwargs):
+        versions = self.get_etag_versions(request, *args, **kwargs)
+        if versions is None:
+            return None
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        )
+        return quote_etag(md5(
+            f'{request.path}|{request.user.pk}|{params}|{versions}'.encode()
+        ).hexdigest())
+
+    def get_conditional_response(self, request, view, *args, **kwargs):
+        etag = self.get_etag(request, *args, **kwargs)
+        if etag is None:
+            return view(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+
+def conditional(view):
+    """Условная обработка GET для дополнительных действий вьюсета."""
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, partial(view, self), *args, **kwargs
+        )
+    return wrapper
@@ -0,0 +1,178 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+
+from django.db.models import Count, Max
+
+from core.cache import bump_version, get_version
+from core.constants import (CATALOG_CHECK_INTERVAL, INGREDIENT_SEARCH_LIMIT,
+                            NGRAM_SIZE)
+from recipes.models import Ingredient, Tag
+
+INGREDIENTS = Ingredient._meta.label_lower
+TAGS = Tag._meta.label_lower
+
+
+def normalize(text):
+    """Приведение строки к виду для поиска без учёта регистра и «ё»."""
+    return text.strip().casefold().replace('ё', 'е')
+
+
+def get_ngrams(text):
+    return {text[i:i + NGRAM_SIZE]
+            for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class VersionedIndex:
+    """Данные каталога в памяти процесса.
+
+    Пересобираются при смене версии `version_name` в общем кеше, поэтому
+    изменение в одном процессе видят все остальные. Без общего кеша
+    (LocMemCache по умолчанию) версия не доходит до других процессов,
+    поэтому раз в CATALOG_CHECK_INTERVAL секунд число строк и наибольший
+    id модели сверяются с прежними, и при расхождении версия меняется
+    в кеше процесса. Так видна загрузка load_data из отдельного процесса.
+    """
+
+    version_name = None
+    model = None
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.state = None
+        self.fingerprint = None
+        self.checked_at = None
+
+    def build(self):
+        raise NotImplementedError
+
+    def check_fingerprint(self):
+        now = time.monotonic()
+        if (self.checked_at is not None
+                and now - self.checked_at < CATALOG_CHECK_INTERVAL):
+            return
+        self.checked_at = now
+        fingerprint = tuple(self.model.objects.aggregate(
+            count=Count('pk'), last=Max('pk')
+        ).values())
+        if self.fingerprint is not None and fingerprint != self.fingerprint:
+            bump_version(self.version_name)
+        self.fingerprint = fingerprint
+
+    def get_state(self):
+        self.check_fingerprint()
+        version = get_version(self.version_name)
+        if self.version != version:
+            with self.lock:
+                if self.version != version:
+                    self.state = self.build()
+                    self.version = version
+        return self.state
+
+
+class TagIndex(VersionedIndex):
+    """Каталог тегов: готовые к выдаче словари и соответствие слагов id."""
+
+    version_name = TAGS
+    model = Tag
+
+    def build(self):
+        items = list(Tag.objects.values('id', 'name', 'slug'))
+        return {
+            'items': items,
+            'by_id': {item['id']: item for item in items},
+            'by_slug': {item['slug']: item['id'] for item in items},
+        }
+
+    def get_items(self):
+        return self.get_state()['items']
+
+    def get(self, pk):
+        return self.get_state()['by_id'].get(pk)
+
+    def get_choices(self):
+        return [(slug, slug) for slug in self.get_state()['by_slug']]
+
+    def get_ids(self, slugs):
+        ids = self.get_state()['by_slug']
+        return [ids[slug] for slug in slugs if slug in ids]
+
+
+class IngredientIndex(VersionedIndex):
+    """Каталог ингредиентов в памяти процесса.
+
+    Хранит готовые к выдаче словари в порядке модели, отсортированные
+    нормализованные названия для поиска по префиксу и n-граммы для
+    поиска по подстроке. Пересобирается при смене версии каталога
+    ингредиентов.
+    """
+
+    version_name = INGREDIENTS
+    model = Ingredient
+
+    def build(self):
+        ordered = list(
+            Ingredient.objects.values('id', 'name', 'measurement_unit')
+        )
+        items = sorted(
+            ordered, key=lambda item: (normalize(item['name']), item['id'])
+        )
+        keys = [normalize(item['name']) for item in items]
+        ngrams = defaultdict(set)
+        for position, key in enumerate(keys):
+            for ngram in get_ngrams(key):
+                ngrams[ngram].add(position)
+        return {
+            'ordered': ordered,
+            'by_id': {item['id']: item for item in ordered},
+            'items': items,
+            'keys': keys,
+            'ngrams': dict(ngrams),
+        }
+
+    def get_items(self):
+        return self.get_state()['ordered']
+
+    def get(self, pk):
+        return self.get_state()['by_id'].get(pk)
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        """Ингредиенты, содержащие `query`; совпадения по префиксу первыми."""
+        state = self.get_state()
+        items, keys, ngrams = state['items'], state['keys'], state['ngrams']
+        query = normalize(query)
+        if not query:
+            return items[:limit]
+        found = []
+        position = bisect_left(keys, query)
+        while (position < len(keys) and len(found) < limit
+               and keys[position].startswith(query)):
+            found.append(position)
+            position += 1
+        if len(found) < limit:
+            prefixed = set(found)
+            found.extend(
+                position
+                for position in self.get_candidates(query, keys, ngrams)
+                if position not in prefixed and query in keys[position]
+            )
+        return [items[position] for position in found[:limit]]
+
+    @staticmethod
+    def get_candidates(query, keys, ngrams):
+        if len(query) < NGRAM_SIZE:
+            return range(len(keys))
+        candidates = None
+        for ngram in get_ngrams(query):
+            positions = ngrams.get(ngram, set())
+            candidates = (positions if candidates is None
+                          else candidates & positions)
+            if not candidates:
+                return ()
+        return sorted(candidates)
+
+
+ingredient_index = IngredientIndex()
+tag_index = TagIndex()
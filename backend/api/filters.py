@@ -1,6 +1,13 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework
 
-from recipes.models import Ingredient, Recipe, Tag
+from .catalog import tag_index
+from recipes.models import Ingredient, Recipe
+from recipes.search import search
+
+
+def get_tag_choices():
+    return tag_index.get_choices()
 
 
 class IngredientFilter(rest_framework.FilterSet):
@@ -16,9 +23,10 @@ class IngredientFilter(rest_framework.FilterSet):
 class RecipeFilter(rest_framework.FilterSet):
     """Фильтр для рецептов."""
 
-    tags = rest_framework.ModelMultipleChoiceFilter(field_name='tags__slug',
-                                                    to_field_name='slug',
-                                                    queryset=Tag.objects.all())
+    name = rest_framework.CharFilter(lookup_expr='icontains')
+    search = rest_framework.CharFilter(method='search_filter')
+    tags = rest_framework.MultipleChoiceFilter(choices=get_tag_choices,
+                                               method='tags_filter')
     is_favorited = rest_framework.BooleanFilter(
         method='is_favorited_filter')
     is_in_shopping_cart = rest_framework.BooleanFilter(
@@ -26,7 +34,24 @@ class RecipeFilter(rest_framework.FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('name', 'search', 'author', 'tags', 'is_favorited',
+                  'is_in_shopping_cart')
+
+    def search_filter(self, queryset, name, value):
+        return search(queryset, value)
+
+    def tags_filter(self, queryset, name, value):
+        """Рецепты хотя бы с одним из тегов без соединения с таблицей тегов.
+
+        Слаги переводятся в id по кешу тегов в памяти процесса, а условие
+        на связующую таблицу задаётся подзапросом EXISTS, поэтому рецепт
+        с несколькими из выбранных тегов не повторяется в выдаче.
+        """
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag_id__in=tag_index.get_ids(value)
+            )
+        ))
 
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user
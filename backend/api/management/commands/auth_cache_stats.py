@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.authentication import stats
+
+
+class Command(BaseCommand):
+    help = 'Счётчики попаданий и промахов кеша аутентификации.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики.'
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            stats.reset()
+            self.stdout.write(self.style.SUCCESS('Counters are reset!'))
+            return
+        totals = stats.get()
+        requests = totals['hits'] + totals['misses']
+        ratio = totals['hits'] / requests if requests else 0
+        self.stdout.write(
+            f'hits: {totals["hits"]}, misses: {totals["misses"]}, '
+            f'hit ratio: {ratio:.1%}'
+        )
@@ -0,0 +1,78 @@
+import json
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.renderers import FastJSONRenderer, orjson
+from api.representations import recipe_rows, represent_recipes
+from recipes.models import Recipe
+
+
+class ASCIIJSONRenderer(JSONRenderer):
+    ensure_ascii = True
+
+
+class Command(BaseCommand):
+    help = 'Сравнение скорости и размера ответов JSON-рендереров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'payloads', nargs='*',
+            help='Файлы с записанными ответами списка рецептов. '
+                 'Без них ответ строится из базы.'
+        )
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Число рецептов в ответе из базы.')
+        parser.add_argument('--repeat', type=int, default=100,
+                            help='Число повторов для замера времени.')
+
+    def get_payloads(self, options):
+        if not options['payloads']:
+            request = Request(RequestFactory().get(
+                '/', HTTP_HOST=settings.ALLOWED_HOSTS[0]
+            ))
+            request.user = AnonymousUser()
+            rows = list(recipe_rows(Recipe.objects.all(),
+                                    request.user)[:options['limit']])
+            return [('database', {
+                'count': len(rows),
+                'results': represent_recipes(rows, {'request': request}),
+            })]
+        payloads = []
+        for path in options['payloads']:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    payloads.append((path, json.load(file)))
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать {path}: {error}')
+        return payloads
+
+    def handle(self, *args, **options):
+        renderers = [
+            ('json, ensure_ascii', ASCIIJSONRenderer()),
+            ('json', JSONRenderer()),
+        ]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('orjson is not installed.'))
+        for name, payload in self.get_payloads(options):
+            self.stdout.write(name)
+            expected = JSONRenderer().render(payload)
+            for label, renderer in renderers:
+                start = perf_counter()
+                for _ in range(options['repeat']):
+                    content = renderer.render(payload)
+                elapsed = (perf_counter() - start) / options['repeat'] * 1000
+                same = ('' if isinstance(renderer, ASCIIJSONRenderer)
+                        else ', identical' if content == expected
+                        else ', DIFFERENT')
+                self.stdout.write(
+                    f'  {label}: {elapsed:.3f} ms, '
+                    f'{len(content)} bytes{same}'
+                )
@@ -0,0 +1,124 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch, prefetch_related_objects
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.representations import (profile_rows, recipe_rows,
+                                 represent_profile, represent_recipes,
+                                 represent_subscriptions)
+from api.serializers import (RecipeSerializer, SubscribeGETSerializer,
+                             UserProfileSerializer)
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Сравнение ответов и скорости сериализаторов DRF '
+            'и быстрого представления.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email пользователя запроса.')
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Число объектов в ответе.')
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Число повторов для замера времени.')
+
+    def get_request(self, email):
+        request = Request(RequestFactory().get(
+            '/', HTTP_HOST=settings.ALLOWED_HOSTS[0]
+        ))
+        if email is None:
+            request.user = AnonymousUser()
+            return request
+        try:
+            request.user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {email} не найден.')
+        return request
+
+    def get_cases(self, request, limit):
+        user = request.user
+
+        def serialize_recipes():
+            recipes = list(
+                Recipe.objects.with_related().with_user_flags(user)[:limit]
+            )
+            return RecipeSerializer(recipes, many=True,
+                                    context={'request': request}).data
+
+        def represent_recipes_fast():
+            rows = list(
+                recipe_rows(Recipe.objects.with_user_flags(user), user)[:limit]
+            )
+            return represent_recipes(rows, {'request': request})
+
+        def serialize_users():
+            return UserProfileSerializer(
+                User.objects.all()[:limit], many=True,
+                context={'request': request}
+            ).data
+
+        def represent_users_fast():
+            context = {'request': request}
+            return [represent_profile(context, row)
+                    for row in profile_rows(User.objects.all()[:limit])]
+
+        cases = [
+            ('recipes', serialize_recipes, represent_recipes_fast),
+            ('users', serialize_users, represent_users_fast),
+        ]
+        if not user.is_authenticated:
+            return cases
+        authors = User.objects.filter(
+            subscriptions_to_author__user=user
+        ).order_by('username')[:limit]
+
+        def serialize_subscriptions():
+            page = list(authors)
+            prefetch_related_objects(page, Prefetch(
+                'recipes',
+                queryset=Recipe.objects.latest_per_author(
+                    [author.id for author in page]
+                )
+            ))
+            return SubscribeGETSerializer(page, many=True,
+                                          context={'request': request}).data
+
+        def represent_subscriptions_fast():
+            return represent_subscriptions(list(profile_rows(authors)),
+                                           {'request': request})
+
+        cases.append(('subscriptions', serialize_subscriptions,
+                      represent_subscriptions_fast))
+        return cases
+
+    @staticmethod
+    def measure(view, repeat):
+        start = perf_counter()
+        for _ in range(repeat):
+            data = view()
+        return JSONRenderer().render(data), (
+            (perf_counter() - start) / repeat * 1000
+        )
+
+    def handle(self, *args, **options):
+        request = self.get_request(options['user'])
+        failed = False
+        for name, slow, fast in self.get_cases(request, options['limit']):
+            expected, slow_time = self.measure(slow, options['repeat'])
+            actual, fast_time = self.measure(fast, options['repeat'])
+            report = (f'{name}: serializer {slow_time:.1f} ms, '
+                      f'fast {fast_time:.1f} ms')
+            if expected == actual:
+                self.stdout.write(self.style.SUCCESS(f'{report}, identical.'))
+            else:
+                failed = True
+                self.stdout.write(self.style.ERROR(f'{report}, DIFFERENT.'))
+        if failed:
+            raise CommandError('Быстрое представление расходится '
+                               'с сериализаторами.')
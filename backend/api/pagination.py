@@ -1,10 +1,179 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from functools import partial
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.cache import get_version
+from core.constants import (COUNT_CACHE_TIMEOUT, COUNT_ESTIMATE_THRESHOLD,
+                            DEFAULT_PAGE_SIZE)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, берущий общее число объектов из кеша.
+
+    Для запросов без фильтрации на PostgreSQL может использовать оценку
+    планировщика (pg_class.reltuples) вместо COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, cache_key=None,
+                 estimate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.estimate = estimate
 
-from core.constants import DEFAULT_PAGE_SIZE
+    @cached_property
+    def count(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = self.estimated_count()
+            if count is None:
+                count = super().count
+            cache.set(self.cache_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def estimated_count(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if (not self.estimate or query.where
+                or connection.vendor != 'postgresql'):
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                (query.model._meta.db_table,)
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < COUNT_ESTIMATE_THRESHOLD:
+            return None
+        return row[0]
 
 
 class FoodgramPaginator(PageNumberPagination):
-    """Пагинация проекта."""
+    """Пагинация проекта.
+
+    Общее число объектов кешируется по нормализованным параметрам
+    запроса и сбрасывается сигналами при изменении данных.
+    """
 
     page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = 'limit'
+    count_ignored_params = ('recipes_limit',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CachedCountPaginator,
+            cache_key=self.get_count_cache_key(queryset, request),
+            estimate=(settings.PAGINATION_COUNT_ESTIMATE
+                      and not request.user.is_authenticated)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count_cache_key(self, queryset, request):
+        ignored = {self.page_query_param, self.page_size_query_param,
+                   *self.count_ignored_params}
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+            if key not in ignored
+        )
+        label = queryset.model._meta.label_lower
+        digest = md5(
+            f'{request.path}|{request.user.pk}|{params}'.encode()
+        ).hexdigest()
+        return f'count:{label}:{get_version(label)}:{digest}'
+
+
+class RecipeFeedPaginator(FoodgramPaginator):
+    """Пагинация ленты рецептов.
+
+    По умолчанию работает как постраничная. Если в запросе передан
+    параметр `cursor`, включается keyset-пагинация по паре
+    (created_at, id): без подсчёта общего числа рецептов и без OFFSET,
+    поэтому любая страница ленты выбирается одинаково быстро.
+
+    Выдача с параметрами из `ranked_params` упорядочена по релевантности,
+    которую курсор по (created_at, id) не сохранил бы, поэтому такие
+    запросы всегда разбиваются на страницы по номеру.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    ordering = ('-created_at', '-id')
+    ranked_params = ('search',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.cursor_query_param not in request.query_params
+                or any(request.query_params.get(param)
+                       for param in self.ranked_params)):
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params[self.cursor_query_param]
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, id__lt=pk)
+            )
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            self.encode_cursor(last.created_at, last.id)
+        )
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        return None
+
+    @staticmethod
+    def encode_cursor(created_at, pk):
+        """Непрозрачный токен позиции в ленте."""
+        token = f'{created_at.isoformat()}|{pk}'.encode()
+        return urlsafe_b64encode(token).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            token = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            created_at, pk = token.decode().split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
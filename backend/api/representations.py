@@ -0,0 +1,218 @@
+"""Быстрое представление рецептов и пользователей для чтения.
+
+Функции строят те же словари, что RecipeSerializer, UserProfileSerializer
+и SubscribeGETSerializer, но из строк values_list(), минуя поля DRF.
+Совпадение ответов обоих путей проверяет команда compare_serializers.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+
+from .catalog import ingredient_index, tag_index
+from core.thumbnails import get_thumbnail_url_by_name
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from users.models import User
+
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email',
+               'avatar')
+PROFILE_FIELDS = USER_FIELDS + ('recipes_count', 'subscribers_count')
+RECIPE_FIELDS = (
+    'id', 'name', 'image', 'text', 'cooking_time', 'favorites_count',
+    'created_at', *(f'author__{field}' for field in USER_FIELDS)
+)
+SHORT_RECIPE_FIELDS = ('id', 'name', 'image', 'cooking_time', 'author_id')
+USER_FLAGS = ('is_favorited', 'is_in_shopping_cart')
+
+IMAGE_STORAGE = Recipe._meta.get_field('image').storage
+AVATAR_STORAGE = User._meta.get_field('avatar').storage
+
+
+def get_catalog(context, index):
+    """Состояние каталога, общее для всех сериализаторов одного ответа.
+
+    Версия каталога проверяется один раз на ответ, а не на каждый
+    вложенный объект.
+    """
+    key = f'catalog:{index.version_name}'
+    if key not in context:
+        context[key] = index.get_state()
+    return context[key]
+
+
+def get_subscribed_ids(context):
+    """ID авторов, на которых подписан текущий пользователь.
+
+    Загружаются одним запросом и кешируются в контексте ответа.
+    """
+    if 'subscribed_ids' not in context:
+        user = context['request'].user
+        context['subscribed_ids'] = (
+            set(user.user_subscriptions.values_list('author_id', flat=True))
+            if user.is_authenticated else set()
+        )
+    return context['subscribed_ids']
+
+
+def load_tag_ids(recipe_ids):
+    """ID тегов рецептов одним запросом к связующей таблице."""
+    tag_ids = {pk: [] for pk in recipe_ids}
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe_id__in=tag_ids
+    ).order_by('pk').values_list('recipe_id', 'tag_id'):
+        tag_ids[recipe_id].append(tag_id)
+    return tag_ids
+
+
+def load_ingredients(recipe_ids, context):
+    """Ингредиенты рецептов в виде готовых словарей."""
+    ingredients = defaultdict(list)
+    if not settings.INGREDIENT_INDEX:
+        for recipe_id, *item in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('pk').values_list(
+            'recipe_id', 'ingredient_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        ):
+            ingredients[recipe_id].append(dict(zip(
+                ('id', 'name', 'measurement_unit', 'amount'), item
+            )))
+        return ingredients
+    lines = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('pk').values_list('recipe_id', 'ingredient_id', 'amount')
+    catalog = get_catalog(context, ingredient_index)['by_id']
+    missing = {pk for _, pk, _ in lines if pk not in catalog}
+    if missing:
+        catalog = {**catalog, **{
+            item['id']: item for item in Ingredient.objects.filter(
+                pk__in=missing
+            ).values('id', 'name', 'measurement_unit')
+        }}
+    for recipe_id, ingredient_id, amount in lines:
+        ingredients[recipe_id].append(
+            {**catalog[ingredient_id], 'amount': amount}
+        )
+    return ingredients
+
+
+def get_file_url(request, storage, name):
+    if not name:
+        return None
+    return request.build_absolute_uri(storage.url(name))
+
+
+def get_thumbnails(request, name, sizes):
+    if not name:
+        return None
+    return {
+        size: request.build_absolute_uri(get_thumbnail_url_by_name(name, size))
+        for size in sizes
+    }
+
+
+def represent_user(context, id, username, first_name, last_name, email,
+                   avatar):
+    """Словарь UserSerializer."""
+    request = context['request']
+    return {
+        'username': username,
+        'first_name': first_name,
+        'last_name': last_name,
+        'id': id,
+        'email': email,
+        'is_subscribed': id in get_subscribed_ids(context),
+        'avatar': get_file_url(request, AVATAR_STORAGE, avatar),
+        'thumbnails': get_thumbnails(request, avatar, ('avatar',)),
+    }
+
+
+def represent_profile(context, user):
+    """Словарь UserProfileSerializer по строке или объекту пользователя."""
+    avatar = user.avatar
+    return {
+        **represent_user(context, user.id, user.username, user.first_name,
+                         user.last_name, user.email,
+                         getattr(avatar, 'name', avatar)),
+        'recipes_count': user.recipes_count,
+        'subscribers_count': user.subscribers_count,
+    }
+
+
+def represent_short_recipe(context, row):
+    """Словарь SimpleRecipeSerializer."""
+    request = context['request']
+    return {
+        'id': row.id,
+        'name': row.name,
+        'image': get_file_url(request, IMAGE_STORAGE, row.image),
+        'thumbnails': get_thumbnails(request, row.image, ('card',)),
+        'cooking_time': row.cooking_time,
+    }
+
+
+def recipe_rows(queryset, user):
+    """Строки рецептов для `represent_recipes`.
+
+    `queryset` должен быть построен `with_user_flags(user)`.
+    """
+    fields = RECIPE_FIELDS
+    if user.is_authenticated:
+        fields += USER_FLAGS
+    return queryset.values_list(*fields, named=True)
+
+
+def represent_recipes(rows, context):
+    """Словари RecipeSerializer для строк `recipe_rows`."""
+    request = context['request']
+    recipe_ids = [row.id for row in rows]
+    tag_ids = load_tag_ids(recipe_ids)
+    tags = get_catalog(context, tag_index)['by_id']
+    ingredients = load_ingredients(recipe_ids, context)
+    return [
+        {
+            'id': row.id,
+            'tags': [tags[pk] for pk in tag_ids[row.id] if pk in tags],
+            'author': represent_user(
+                context, row.author__id, row.author__username,
+                row.author__first_name, row.author__last_name,
+                row.author__email, row.author__avatar
+            ),
+            'ingredients': ingredients[row.id],
+            'is_favorited': bool(getattr(row, 'is_favorited', False)),
+            'is_in_shopping_cart': bool(
+                getattr(row, 'is_in_shopping_cart', False)
+            ),
+            'name': row.name,
+            'image': get_file_url(request, IMAGE_STORAGE, row.image),
+            'thumbnails': get_thumbnails(request, row.image,
+                                         ('card', 'detail')),
+            'text': row.text,
+            'cooking_time': row.cooking_time,
+            'favorites_count': row.favorites_count,
+        }
+        for row in rows
+    ]
+
+
+def profile_rows(queryset):
+    """Строки пользователей для `represent_profile`."""
+    return queryset.values_list(*PROFILE_FIELDS, named=True)
+
+
+def represent_subscriptions(rows, context, recipes_limit=None):
+    """Словари SubscribeGETSerializer для строк `profile_rows`."""
+    recipes = defaultdict(list)
+    for row in Recipe.objects.latest_per_author(
+        [row.id for row in rows], recipes_limit
+    ).values_list(*SHORT_RECIPE_FIELDS, named=True):
+        recipes[row.author_id].append(row)
+    return [
+        {
+            **represent_profile(context, row),
+            'recipes': [
+                represent_short_recipe(context, recipe)
+                for recipe in recipes[row.id][:recipes_limit]
+            ],
+        }
+        for row in rows
+    ]
@@ -1,27 +1,131 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from .catalog import ingredient_index, tag_index
+from .representations import get_catalog, get_subscribed_ids, load_tag_ids
 from core.constants import INGREDIENT_MIN_AMOUNT, MAX_POSITIVE_VALUE
+from core.thumbnails import get_thumbnail_url
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShoppingListItem, Tag)
+from recipes.search import update_search_index
 from users.models import Subscribe, User
 
 
+class ThumbnailsField(serializers.Field):
+    """Абсолютные URL миниатюр изображения по размерам."""
+
+    def __init__(self, sizes, **kwargs):
+        self.sizes = sizes
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, file):
+        if not file:
+            return None
+        request = self.context['request']
+        return {size: request.build_absolute_uri(get_thumbnail_url(file, size))
+                for size in self.sizes}
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, загружаемых одним запросом.
+
+    Сообщает обо всех неверных идентификаторах сразу.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        self.child_relation.prefetch(data)
+        objects, errors = [], []
+        for item in data:
+            try:
+                objects.append(self.child_relation.to_internal_value(item))
+            except serializers.ValidationError as error:
+                errors.extend(error.detail)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return objects
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле первичного ключа с предварительной загрузкой объектов.
+
+    После вызова `prefetch` объекты берутся из загруженного словаря
+    без отдельного запроса на каждое значение.
+    """
+
+    prefetched = None
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_pk(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            raise TypeError
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            raise ValueError
+
+    def prefetch(self, values):
+        """Загрузка всех объектов из `values` одним запросом."""
+        pks = set()
+        for value in values:
+            try:
+                pks.add(self.to_pk(value))
+            except (TypeError, ValueError):
+                pass
+        self.prefetched = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        if self.prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.to_pk(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.prefetched:
+            self.fail('does_not_exist', pk_value=data)
+        return self.prefetched[pk]
+
+
 class UserSerializer(DjoserUserSerializer):
     """Сериализатор для пользователей."""
 
     is_subscribed = serializers.SerializerMethodField()
+    thumbnails = ThumbnailsField(sizes=('avatar',), source='avatar')
 
     class Meta(DjoserUserSerializer.Meta):
         model = User
-        fields = DjoserUserSerializer.Meta.fields + ('is_subscribed', 'avatar')
+        fields = DjoserUserSerializer.Meta.fields + ('is_subscribed', 'avatar',
+                                                     'thumbnails')
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        return (user.is_authenticated
-                and user.user_subscriptions.filter(author=obj).exists())
+        return obj.id in get_subscribed_ids(self.context)
+
+
+class UserProfileSerializer(UserSerializer):
+    """Сериализатор профиля пользователя со счётчиками."""
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ('recipes_count',
+                                               'subscribers_count')
 
 
 class AvatarSerializer(serializers.ModelSerializer):
@@ -38,35 +142,42 @@ class AvatarSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Требуется аватар.')
         return data
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        return super().update(instance, validated_data)
+
 
 class SimpleRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор рецептов пользователя."""
 
+    thumbnails = ThumbnailsField(sizes=('card',), source='image')
+
     class Meta:
         model = Recipe
         fields = ('id', 'name',
-                  'image', 'cooking_time')
+                  'image', 'thumbnails', 'cooking_time')
 
 
-class SubscribeGETSerializer(UserSerializer):
+class SubscribeGETSerializer(UserProfileSerializer):
     """Сериализатор для получения подписок [GET]."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(default=0)
 
-    class Meta(UserSerializer.Meta):
-        fields = UserSerializer.Meta.fields + ('recipes', 'recipes_count')
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + ('recipes',)
+
+    @staticmethod
+    def get_recipes_limit(request):
+        """Ограничение числа рецептов из параметра `recipes_limit`."""
+        try:
+            recipes_limit = int(request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            return None
+        return recipes_limit if recipes_limit >= 0 else None
 
     def get_recipes(self, obj):
-        request = self.context['request']
-        recipes_limit = request.query_params.get('recipes_limit')
-        queryset = obj.recipes.all()
-        if recipes_limit:
-            try:
-                recipes_limit = int(recipes_limit)
-            except ValueError:
-                recipes_limit = None
-            queryset = queryset[:recipes_limit]
+        recipes_limit = self.get_recipes_limit(self.context['request'])
+        queryset = obj.recipes.all()[:recipes_limit]
         return SimpleRecipeSerializer(queryset, many=True,
                                       context=self.context).data
 
@@ -113,7 +224,11 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    """Сериализатор ингредиента для получения рецептов."""
+    """Сериализатор ингредиента для получения рецептов.
+
+    Название и единица измерения берутся из каталога ингредиентов
+    в памяти процесса, без соединения с таблицей ингредиентов.
+    """
 
     id = serializers.IntegerField(source='ingredient.id')
     name = serializers.CharField(source='ingredient.name')
@@ -126,32 +241,83 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name',
                   'measurement_unit', 'amount')
 
+    def to_representation(self, instance):
+        if not settings.INGREDIENT_INDEX:
+            return super().to_representation(instance)
+        ingredient = get_catalog(self.context,
+                                 ingredient_index)['by_id'].get(
+            instance.ingredient_id
+        )
+        if ingredient is None:
+            return super().to_representation(instance)
+        return {**ingredient, 'amount': instance.amount}
+
+
+class RecipeTagsField(serializers.Field):
+    """Теги рецепта из каталога тегов в памяти процесса.
+
+    id тегов всех рецептов ответа загружаются одним запросом
+    к связующей таблице, без соединения с таблицей тегов.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_tag_ids(self, recipe):
+        tag_ids = self.context.setdefault('recipe_tag_ids', {})
+        if recipe.pk not in tag_ids:
+            recipes = (self.root.instance
+                       if isinstance(self.root, serializers.ListSerializer)
+                       else (recipe,))
+            tag_ids.update(load_tag_ids(
+                {recipe.pk, *(obj.pk for obj in recipes)} - tag_ids.keys()
+            ))
+        return tag_ids[recipe.pk]
+
+    def to_representation(self, recipe):
+        tags = get_catalog(self.context, tag_index)['by_id']
+        return [tags[pk] for pk in self.get_tag_ids(recipe) if pk in tags]
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор рецептов."""
 
     author = UserSerializer(read_only=True)
-    tags = TagSerializer(many=True, read_only=True)
+    tags = RecipeTagsField()
     ingredients = RecipeIngredientSerializer(
         many=True, read_only=True, source='recipe_ingredients')
     is_favorited = serializers.BooleanField(read_only=True, default=0)
     is_in_shopping_cart = serializers.BooleanField(read_only=True,
                                                    default=0)
     image = Base64ImageField()
+    thumbnails = ThumbnailsField(sizes=('card', 'detail'), source='image')
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags',
                   'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image',
-                  'text', 'cooking_time')
+                  'name', 'image', 'thumbnails',
+                  'text', 'cooking_time', 'favorites_count')
+
+
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """Список ингредиентов рецепта с загрузкой ингредиентов одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child.fields['id'].prefetch(
+                item.get('id') for item in data if isinstance(item, dict)
+            )
+        return super().to_internal_value(data)
 
 
 class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
     """Сериализатор ингредиента для создания рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(
+    id = BulkPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(), source='ingredient'
     )
     amount = serializers.IntegerField(
@@ -167,14 +333,15 @@ class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'amount')
+        list_serializer_class = RecipeIngredientListSerializer
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """Сериализатор создания рецепта."""
 
-    tags = serializers.PrimaryKeyRelatedField(many=True,
-                                              queryset=Tag.objects.all(),
-                                              allow_empty=False)
+    tags = BulkPrimaryKeyRelatedField(many=True,
+                                      queryset=Tag.objects.all(),
+                                      allow_empty=False)
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientCreateSerializer(many=True,
                                                    allow_empty=False)
@@ -234,18 +401,52 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             author=self.context['request'].user, **validated_data)
         recipe.tags.set(tags)
         self.add_ingredients(recipe, ingredients)
+        update_search_index((recipe.pk,))
         return recipe
 
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        """Обновление ингредиентов рецепта по разнице с текущими.
+
+        Изменённые количества обновляются, новые строки добавляются,
+        лишние удаляются, не более чем тремя запросами. Возвращает
+        старое и новое количество каждого ингредиента.
+        """
+        existing = {line.ingredient_id: line
+                    for line in recipe.recipe_ingredients.all()}
+        old_amounts = {pk: line.amount for pk, line in existing.items()}
+        new_amounts = {ingredient['ingredient'].id: ingredient['amount']
+                       for ingredient in ingredients}
+        removed = old_amounts.keys() - new_amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = [existing[pk] for pk, amount in new_amounts.items()
+                   if pk in existing and existing[pk].amount != amount]
+        for line in changed:
+            line.amount = new_amounts[line.ingredient_id]
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient_id=pk, amount=amount)
+            for pk, amount in new_amounts.items() if pk not in existing
+        )
+        return old_amounts, new_amounts
+
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        instance.ingredients.clear()
         instance.tags.set(tags)
-        self.add_ingredients(instance, ingredients)
+        old_amounts, new_amounts = self.update_ingredients(instance,
+                                                           ingredients)
+        ShoppingListItem.objects.apply_recipe_change(instance, old_amounts,
+                                                     new_amounts)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
+        prefetch_related_objects([instance], *Recipe.objects.related_lookups())
         return RecipeSerializer(instance, context=self.context).data
 
 
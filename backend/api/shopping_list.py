@@ -0,0 +1,108 @@
+import csv
+import logging
+from hashlib import md5
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+from core.cache import get_versions
+from core.constants import (PDF_FONT_SIZE, PDF_LINE_HEIGHT, PDF_MARGIN,
+                            PDF_PAGE_SIZE, SHOPPING_CART_CHUNK_SIZE)
+from recipes.models import (Ingredient, Recipe, ShoppingCart,
+                            ShoppingListItem)
+
+logger = logging.getLogger(__name__)
+
+TITLE = 'Список покупок:'
+CSV_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
+
+
+def get_ingredients(user):
+    """Сводный список покупок пользователя."""
+    return (
+        ShoppingListItem.objects
+        .filter(user=user)
+        .values_list('ingredient__name', 'ingredient__measurement_unit',
+                     'total_amount')
+        .order_by('ingredient__name')
+        .iterator(chunk_size=SHOPPING_CART_CHUNK_SIZE)
+    )
+
+
+def get_etag(user, file_type):
+    """ETag по составу корзины и версиям рецептов и ингредиентов.
+
+    Версия ингредиентов учитывает переименование и смену единиц
+    измерения, которые меняют содержимое файла.
+    """
+    recipe_ids = list(
+        ShoppingCart.objects.filter(user=user)
+        .order_by('recipe_id').values_list('recipe_id', flat=True)
+    )
+    versions = get_versions(Recipe._meta.label_lower,
+                            Ingredient._meta.label_lower)
+    return md5(f'{file_type}|{versions}|{recipe_ids}'.encode()).hexdigest()
+
+
+def render_txt(ingredients):
+    yield f'{TITLE}\n'
+    for name, unit, amount in ingredients:
+        yield f'{name} ({unit}) — {amount}\n'
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in ingredients:
+        yield writer.writerow(row)
+
+
+def get_pdf_font():
+    """Шрифт с кириллицей из SHOPPING_CART_PDF_FONT или None.
+
+    Встроенный растровый шрифт Pillow не содержит кириллицы, поэтому
+    без файла шрифта PDF не формируется. Шрифт загружается до начала
+    ответа: ошибка при отрисовке оборвала бы уже начатую передачу файла.
+    """
+    try:
+        return ImageFont.truetype(settings.SHOPPING_CART_PDF_FONT,
+                                  PDF_FONT_SIZE)
+    except OSError:
+        logger.error('Шрифт для PDF не найден: %s',
+                     settings.SHOPPING_CART_PDF_FONT)
+        return None
+
+
+def render_pdf(ingredients, font):
+    """Простой PDF: строки списка отрисовываются на страницах A4."""
+    lines_per_page = (PDF_PAGE_SIZE[1] - 2 * PDF_MARGIN) // PDF_LINE_HEIGHT
+    pages = []
+    page = draw = None
+    lines = render_txt(ingredients)
+    for number, line in enumerate(lines):
+        if number % lines_per_page == 0:
+            page = Image.new('L', PDF_PAGE_SIZE, 255)
+            draw = ImageDraw.Draw(page)
+            pages.append(page)
+        position = (PDF_MARGIN,
+                    PDF_MARGIN + number % lines_per_page * PDF_LINE_HEIGHT)
+        draw.text(position, line.rstrip('\n'), fill=0, font=font)
+    buffer = BytesIO()
+    pages[0].save(buffer, format='PDF', save_all=True,
+                  append_images=pages[1:])
+    yield buffer.getvalue()
+
+
+FILE_TYPES = {
+    'txt': ('text/plain; charset=utf-8', render_txt),
+    'csv': ('text/csv; charset=utf-8', render_csv),
+    'pdf': ('application/pdf', render_pdf),
+}
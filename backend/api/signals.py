@@ -0,0 +1,142 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, caching, catalog
+from core.cache import bump_version
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Subscribe, User
+
+RECIPES = Recipe._meta.label_lower
+USERS = User._meta.label_lower
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipes_changed(**kwargs):
+    """Сброс кешированных данных о списках рецептов."""
+    bump_version(RECIPES)
+
+
+@receiver((post_save, post_delete), sender=User)
+@receiver((post_save, post_delete), sender=Subscribe)
+@receiver((post_save, post_delete), sender=Recipe)
+def users_changed(**kwargs):
+    """Сброс кешированных данных о списках пользователей и подписок."""
+    bump_version(USERS, caching.USERS)
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_credentials_changed(sender, instance, **kwargs):
+    """Сброс пользователя в кеше аутентификации.
+
+    Срабатывает при смене пароля, деактивации и любом изменении профиля.
+    """
+    authentication.evict_user(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Subscribe)
+@receiver((post_save, post_delete), sender=Recipe)
+def author_counters_changed(sender, instance, **kwargs):
+    """Сброс автора в кеше аутентификации при изменении его счётчиков."""
+    authentication.evict_user(instance.author_id)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Сброс токена в кеше аутентификации при выходе."""
+    authentication.evict_token(instance.key)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscribe)
+def user_state_changed(sender, instance, **kwargs):
+    """Сброс ETag ответов с персональными полями пользователя."""
+    bump_version(caching.USER_STATE.format(instance.user_id))
+
+
+def bump_recipe_responses(pk, author_id):
+    """Сброс кешированных карточки рецепта и списков, где он выводится."""
+    bump_version(
+        caching.FEED,
+        caching.RECIPE.format(pk),
+        caching.AUTHOR.format(author_id),
+        *(caching.TAG.format(slug)
+          for slug in Tag.objects.filter(recipes=pk)
+          .values_list('slug', flat=True))
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(pre_delete, sender=Recipe)
+def recipe_responses_changed(sender, instance, **kwargs):
+    """Сброс кешированных ответов с рецептом."""
+    bump_recipe_responses(instance.pk, instance.author_id)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def favorites_count_changed(sender, instance, **kwargs):
+    """Сброс кешированных ответов с числом добавлений рецепта в избранное.
+
+    Число выводится и в карточке, и в списках рецептов, поэтому
+    сбрасываются те же версии, что и при изменении самого рецепта.
+    """
+    author_id = Recipe.objects.filter(pk=instance.recipe_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is not None:
+        bump_recipe_responses(instance.recipe_id, author_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, pk_set, **kwargs):
+    """Сброс кешированных списков по старым и новым тегам рецепта."""
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+    tags = (instance.tags.all() if pk_set is None
+            else Tag.objects.filter(pk__in=pk_set))
+    bump_version(
+        caching.FEED,
+        caching.RECIPE.format(instance.pk),
+        *(caching.TAG.format(slug)
+          for slug in tags.values_list('slug', flat=True))
+    )
+
+
+@receiver(post_save, sender=User)
+def author_responses_changed(sender, instance, update_fields, **kwargs):
+    """Сброс кешированных ответов с рецептами автора."""
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_version(
+        caching.FEED,
+        caching.AUTHOR.format(instance.pk),
+        *(caching.RECIPE.format(pk)
+          for pk in instance.recipes.values_list('pk', flat=True)),
+        *(caching.TAG.format(slug)
+          for slug in Tag.objects.filter(recipes__author=instance)
+          .distinct().values_list('slug', flat=True))
+    )
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def catalog_changed(**kwargs):
+    """Сброс всех кешированных ответов с рецептами."""
+    bump_version(caching.CATALOG)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    """Пересборка индекса ингредиентов."""
+    bump_version(catalog.INGREDIENTS)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    """Пересборка соответствия слагов тегов их id."""
+    bump_version(catalog.TAGS)
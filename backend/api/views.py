@@ -1,6 +1,11 @@
-from django.db.models import Count, Exists, F, OuterRef, Sum
-from django.http import FileResponse
+from functools import partial
+
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import status, viewsets
@@ -9,40 +14,150 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 
+from . import shopping_list
+from .caching import (CATALOG, FEED, USERS, AnonymousCacheMixin,
+                      ConditionalGetMixin, conditional, get_list_cache_key,
+                      get_recipe_versions)
+from .catalog import INGREDIENTS, TAGS, ingredient_index, tag_index
 from .filters import IngredientFilter, RecipeFilter
+from .pagination import RecipeFeedPaginator
+from .representations import (profile_rows, recipe_rows, represent_profile,
+                              represent_recipes, represent_subscriptions)
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (AvatarSerializer, FavoriteSerializer,
                           IngredientSerializer, RecipeCreateSerializer,
                           RecipeSerializer, ShoppingCartSerializer,
                           SubscribeGETSerializer, SubscribePOSTSerializer,
-                          TagSerializer, UserSerializer)
+                          TagSerializer, UserProfileSerializer)
 from users.models import Subscribe, User
+from core.cache import get_versions
 from core.constants import FILE_NAME
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+
+
+def get_catalog_response(index, request, pk):
+    """Ответ с объектом каталога в памяти процесса."""
+    try:
+        item = index.get(int(pk))
+    except ValueError:
+        item = None
+    if item is None:
+        raise Http404
+    return Response(item)
+
+
+def get_row_or_404(rows, pk):
+    """Единственная строка с первичным ключом `pk`."""
+    try:
+        row = rows.filter(pk=pk).first()
+    except (TypeError, ValueError):
+        row = None
+    if row is None:
+        raise Http404
+    return row
+
+
+class FastUserReadMixin:
+    """Чтение пользователей без сериализаторов DRF.
+
+    Включается настройкой FAST_SERIALIZERS; ответы совпадают
+    с ответами UserProfileSerializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        context = self.get_serializer_context()
+        rows = profile_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(
+            [represent_profile(context, row) for row in page]
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            return super().retrieve(request, *args, **kwargs)
+        row = get_row_or_404(profile_rows(self.get_queryset()),
+                             kwargs[self.lookup_field])
+        return Response(represent_profile(self.get_serializer_context(),
+                                          row))
+
+
+class FastRecipeReadMixin:
+    """Чтение рецептов без сериализаторов DRF.
+
+    Включается настройкой FAST_SERIALIZERS; ответы совпадают
+    с ответами RecipeSerializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(
+            Recipe.objects.with_user_flags(request.user)
+        )
+        page = self.paginate_queryset(recipe_rows(queryset, request.user))
+        return self.get_paginated_response(
+            represent_recipes(page, self.get_serializer_context())
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            return super().retrieve(request, *args, **kwargs)
+        row = get_row_or_404(
+            recipe_rows(Recipe.objects.with_user_flags(request.user),
+                        request.user),
+            kwargs['pk']
+        )
+        return Response(
+            represent_recipes((row,), self.get_serializer_context())[0]
+        )
 
 
-class UserViewSet(DjoserUserViewSet):
+class UserViewSet(ConditionalGetMixin, FastUserReadMixin,
+                  DjoserUserViewSet):
     """Вьюсет для работы с пользователями, подписками и аватаром."""
 
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
-    serializer_class = UserSerializer
+    serializer_class = UserProfileSerializer
+    etag_versions = (USERS,)
+
+    def get_etag_versions(self, request, *args, **kwargs):
+        versions = super().get_etag_versions(request, *args, **kwargs)
+        if self.action == 'subscriptions':
+            versions += get_versions(FEED)
+        return versions
 
     @action(detail=False, methods=('get',),
             permission_classes=(IsAuthenticated,))
+    @conditional
     def me(self, request, *args, **kwargs):
         """Получение данных текущего пользователя."""
+        if settings.FAST_SERIALIZERS:
+            return Response(represent_profile(self.get_serializer_context(),
+                                              request.user))
         return Response(self.get_serializer(request.user).data)
 
     @action(detail=False, methods=('get',),
             permission_classes=(IsAuthenticated,))
+    @conditional
     def subscriptions(self, request):
         """Получение списка подписок текущего пользователя."""
         queryset = User.objects.filter(
             subscriptions_to_author__user=request.user
-        ).annotate(recipes_count=Count('recipes')).order_by('username')
+        ).order_by('username')
+        recipes_limit = SubscribeGETSerializer.get_recipes_limit(request)
+        if settings.FAST_SERIALIZERS:
+            page = self.paginate_queryset(profile_rows(queryset))
+            return self.get_paginated_response(represent_subscriptions(
+                page, self.get_serializer_context(), recipes_limit
+            ))
         page = self.paginate_queryset(queryset)
+        recipes = Recipe.objects.latest_per_author(
+            [author.id for author in page], recipes_limit
+        ).only('id', 'name', 'image', 'cooking_time', 'author_id')
+        prefetch_related_objects(page, Prefetch('recipes', queryset=recipes))
         serializer = SubscribeGETSerializer(page, many=True,
                                             context={'request': request})
         return self.get_paginated_response(serializer.data)
@@ -83,12 +198,12 @@ class UserViewSet(DjoserUserViewSet):
     def delete_avatar(self, request):
         """Удаление аватара."""
         user = request.user
-        user.avatar.delete(save=False)
-        user.save()
+        user.avatar = None
+        user.save(update_fields=('avatar',))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет ингредиентов."""
 
     queryset = Ingredient.objects.all()
@@ -97,42 +212,80 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
+    etag_versions = (CATALOG, INGREDIENTS)
+
+    def get_etag_versions(self, request, *args, **kwargs):
+        ingredient_index.check_fingerprint()
+        return super().get_etag_versions(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.INGREDIENT_INDEX:
+            return super().list(request, *args, **kwargs)
+        name = request.query_params.get('name')
+        return self.get_conditional_response(
+            request, lambda request: Response(
+                ingredient_index.get_items() if name is None
+                else ingredient_index.search(name)
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.INGREDIENT_INDEX:
+            return super().retrieve(request, *args, **kwargs)
+        return self.get_conditional_response(
+            request, partial(get_catalog_response, ingredient_index),
+            *args, **kwargs
+        )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
-    """Вьюсет тегов."""
+class TagViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Вьюсет тегов из каталога в памяти процесса."""
 
     queryset = Tag.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = TagSerializer
     pagination_class = None
+    etag_versions = (CATALOG, TAGS)
+
+    def get_etag_versions(self, request, *args, **kwargs):
+        tag_index.check_fingerprint()
+        return super().get_etag_versions(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, lambda request: Response(tag_index.get_items())
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, partial(get_catalog_response, tag_index),
+            *args, **kwargs
+        )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, AnonymousCacheMixin,
+                    FastRecipeReadMixin, viewsets.ModelViewSet):
     """Вьюсет рецептов."""
 
     permission_classes = (IsAuthorOrReadOnly,)
+    pagination_class = RecipeFeedPaginator
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     http_method_names = ('get', 'post', 'patch', 'delete')
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Recipe.objects.select_related('author').prefetch_related(
-            'tags', 'ingredients'
+        return Recipe.objects.with_related().with_user_flags(
+            self.request.user
         )
-        if user.is_authenticated:
-            queryset = queryset.annotate(
-                is_favorited=Exists(
-                    Favorite.objects.filter(user=user,
-                                            recipe=OuterRef('pk'))
-                ),
-                is_in_shopping_cart=Exists(
-                    ShoppingCart.objects.filter(user=user,
-                                                recipe=OuterRef('pk'))
-                )
-            )
-        return queryset
+
+    def get_etag_versions(self, request, *args, **kwargs):
+        versions = super().get_etag_versions(request, *args, **kwargs)
+        if self.action == 'list':
+            return (get_list_cache_key(request), *versions)
+        recipe_versions = get_recipe_versions(kwargs['pk'])
+        if recipe_versions is None:
+            return None
+        return (*recipe_versions, *versions)
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
@@ -174,33 +327,48 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=('get',),
             permission_classes=(IsAuthenticated,))
     def download_shopping_cart(self, request):
-        """Скачивание файла со списком покупок."""
-        ingredients = (
-            RecipeIngredient.objects
-            .filter(recipe__shopping_cart__user=request.user)
-            .values(name=F('ingredient__name'),
-                    unit=F('ingredient__measurement_unit'))
-            .annotate(total_amount=Sum('amount'))
-            .order_by('name')
+        """Скачивание файла со списком покупок.
+
+        Формат выбирается параметром `type`: txt (по умолчанию), csv, pdf.
+        """
+        file_type = request.query_params.get('type', 'txt')
+        if file_type not in shopping_list.FILE_TYPES:
+            return Response(
+                {'type': f'Доступные форматы: '
+                         f'{", ".join(shopping_list.FILE_TYPES)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        etag = quote_etag(shopping_list.get_etag(request.user, file_type))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        content_type, render = shopping_list.FILE_TYPES[file_type]
+        if render is shopping_list.render_pdf:
+            font = shopping_list.get_pdf_font()
+            if font is None:
+                return Response(
+                    {'type': 'Формат pdf временно недоступен.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            render = partial(render, font=font)
+        response = StreamingHttpResponse(
+            render(shopping_list.get_ingredients(request.user)),
+            content_type=content_type
+        )
+        response['ETag'] = etag
+        response['Content-Disposition'] = (
+            f'attachment; filename="{FILE_NAME}.{file_type}"'
         )
-        file_list = [
-            f'{ingredient["name"]} ({ingredient["unit"]}) — '
-            f'{ingredient["total_amount"]}'
-            for ingredient in ingredients
-        ]
-
-        file_content = 'Список покупок:\n' + '\n'.join(file_list)
-        response = FileResponse(file_content, content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename="{FILE_NAME}"'
         return response
 
     @action(detail=True, methods=('get',),
             url_path='get-link')
     def get_link(self, request, pk=None):
         """Формирование короткой ссылки."""
-        recipe = get_object_or_404(Recipe, pk=pk)
+        recipe = get_object_or_404(Recipe.objects.only('pk', 'short_url'),
+                                   pk=pk)
         short_url_path = reverse('redirect_to_original', kwargs={
-            'slug': recipe.short_url}
+            'slug': recipe.get_short_url()}
         )
         short_link = request.build_absolute_uri(short_url_path)
         return Response({'short-link': short_link}, status=status.HTTP_200_OK)
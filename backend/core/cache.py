@@ -0,0 +1,46 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'version:{}'
+
+
+def get_version(name):
+    """Текущая версия набора данных для построения ключей кеша."""
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def get_versions(*names):
+    """Версии нескольких наборов данных одним обращением к кешу."""
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    return tuple(
+        versions[key] if key in versions else get_version(name)
+        for key, name in zip(keys, names)
+    )
+
+
+def _bump(names):
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_version(*names):
+    """Смена версии делает недействительными все связанные ключи кеша.
+
+    Внутри транзакции версия меняется повторно после её фиксации, чтобы
+    в кеш не попали данные, прочитанные до фиксации.
+    """
+    _bump(names)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(names))
@@ -5,10 +5,43 @@ RECIPE_MAX_LENGTH = 200
 COOKING_MIN_TIME = 1
 MAX_POSITIVE_VALUE = 32767
 
+INGREDIENT_SEARCH_LIMIT = 50
+NGRAM_SIZE = 3
+CATALOG_CHECK_INTERVAL = 60
+
 URL_MAX_LENGTH = 200
-SHORT_URL_LENGTH = 6
+SHORT_URL_LENGTH = 7
+SHORT_URL_ALPHABET = (
+    '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+)
+SHORT_URL_BITS = 40
+SHORT_URL_ROUND_KEYS = (0x5BD1E, 0x3C6EF, 0xA54FF, 0x1F83D)
+SHORT_URL_LRU_SIZE = 4096
+SHORT_URL_CACHE_TIMEOUT = 60 * 60 * 24
+SHORT_URL_REDIRECT_MAX_AGE = 60 * 60 * 24
 SHORT_URL_MAX_LENGTH = 10
 
 DEFAULT_PAGE_SIZE = 6
+COUNT_CACHE_TIMEOUT = 60
+COUNT_ESTIMATE_THRESHOLD = 1000
+RESPONSE_CACHE_TIMEOUT = 300
+AUTH_CACHE_TIMEOUT = 300
+AUTH_CACHE_STATS_INTERVAL = 1000
+
+COMPRESSION_MIN_SIZE = 512
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'text/')
+BROTLI_QUALITY = 5
+
+FILE_NAME = 'shopping_cart'
+SHOPPING_CART_CHUNK_SIZE = 500
+PDF_PAGE_SIZE = (827, 1169)
+PDF_MARGIN = 60
+PDF_FONT_SIZE = 16
+PDF_LINE_HEIGHT = 24
 
-FILE_NAME = 'shopping_cart.txt'
+THUMBNAIL_SIZES = {
+    'card': (480, 360),
+    'detail': (1024, 768),
+    'avatar': (128, 128),
+}
+THUMBNAIL_QUALITY = 80
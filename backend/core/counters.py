@@ -0,0 +1,52 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_init, post_save
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарное изменение счётчика одним UPDATE без чтения строки.
+
+    Счётчик не опускается ниже нуля, даже если разошёлся с данными.
+    """
+    model.objects.filter(pk=pk).update(**{field: Greatest(F(field) + delta,
+                                                          0)})
+
+
+def count_related(model, field):
+    """Выражение с числом строк `model`, ссылающихся на текущую запись."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def connect_counter(sender, field, model, counter):
+    """Поддержка счётчика `counter` модели `model` по строкам `sender`.
+
+    Счётчик меняется при создании и удалении строки `sender`, а также
+    при переносе строки на другую запись через поле `field`. Прежнее
+    значение поля запоминается при загрузке строки, без запросов.
+    """
+    attname = sender._meta.get_field(field).attname
+    previous_attname = f'_previous_{attname}'
+    uid = f'{sender._meta.label}.{field}.{counter}'
+
+    def loaded(instance, **kwargs):
+        setattr(instance, previous_attname, instance.__dict__.get(attname))
+
+    def saved(instance, created, **kwargs):
+        current = getattr(instance, attname)
+        previous = getattr(instance, previous_attname, None)
+        setattr(instance, previous_attname, current)
+        if created:
+            change_counter(model, current, counter, 1)
+        elif previous is not None and previous != current:
+            change_counter(model, previous, counter, -1)
+            change_counter(model, current, counter, 1)
+
+    def deleted(instance, **kwargs):
+        change_counter(model, getattr(instance, attname), counter, -1)
+
+    post_init.connect(loaded, sender=sender, weak=False, dispatch_uid=uid)
+    post_save.connect(saved, sender=sender, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=sender, weak=False, dispatch_uid=uid)
@@ -0,0 +1,115 @@
+"""Сжатие ответов gzip или Brotli.
+
+Brotli — необязательная зависимость: без пакета `brotli` ответы
+сжимаются только gzip.
+"""
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from core.constants import (BROTLI_QUALITY, COMPRESSIBLE_CONTENT_TYPES,
+                            COMPRESSION_MIN_SIZE, RESPONSE_CACHE_TIMEOUT)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def brotli_compress_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+ENCODINGS = {'gzip': (compress_string, compress_sequence)}
+if brotli is not None:
+    ENCODINGS = {
+        'br': (lambda data: brotli.compress(data, quality=BROTLI_QUALITY),
+               brotli_compress_sequence),
+        **ENCODINGS,
+    }
+
+
+def get_encoding(accept_encoding):
+    """Лучшее из поддерживаемых сжатий по заголовку Accept-Encoding.
+
+    При равных весах предпочтение отдаётся Brotli.
+    """
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, *params = part.split(';')
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    weight, encoding = max(
+        (weights.get(encoding, weights.get('*', 0.0)), -position, encoding)
+        for position, encoding in enumerate(ENCODINGS)
+    )[::2]
+    return encoding if weight > 0 else None
+
+
+class CompressionMiddleware:
+    """Сжатие текстовых ответов, в том числе потоковых.
+
+    Ответы короче COMPRESSION_MIN_SIZE не сжимаются. Если представление
+    задало `response.compression_cache_key`, сжатый JSON хранится
+    в кеше рядом с исходными данными, и повторный ответ не сжимается
+    заново. HTML браузерного API содержит CSRF-токен и не кешируется.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(
+                    COMPRESSIBLE_CONTENT_TYPES)
+                or not response.streaming
+                and len(response.content) < COMPRESSION_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = get_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compress, compress_stream = ENCODINGS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            content = self.compress(response, encoding, compress)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compress(response, encoding, compress):
+        key = getattr(response, 'compression_cache_key', None)
+        if key is None or not response['Content-Type'].startswith(
+            'application/json'
+        ):
+            return compress(response.content)
+        key = f'{key}:{response["Content-Type"]}:{encoding}'
+        content = cache.get(key)
+        if content is None:
+            content = compress(response.content)
+            cache.set(key, content, RESPONSE_CACHE_TIMEOUT)
+        return content
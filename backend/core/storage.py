@@ -0,0 +1,103 @@
+import os
+from hashlib import blake2b
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+from core.constants import THUMBNAIL_SIZES
+from core.thumbnails import get_thumbnail_name
+
+REFERENCES = (
+    ('recipes.Recipe', 'image'),
+    ('users.User', 'avatar'),
+)
+
+
+def lock_name(name):
+    """Блокировка имени файла до конца текущей транзакции.
+
+    Под ней сохранение переиспользует существующий файл, а удаление
+    проверяет, что на файл никто не ссылается. Удаление ждёт фиксации
+    транзакции, сохранившей файл, и видит её запись; сохранение после
+    удаления видит, что файла нет, и записывает его заново.
+    На PostgreSQL это рекомендательная блокировка транзакции, на других
+    СУБД блокировка не берётся.
+    """
+    connection = transaction.get_connection()
+    if connection.vendor != 'postgresql':
+        return
+    key = int.from_bytes(blake2b(name.encode(), digest_size=8).digest(),
+                         'big', signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (key,))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по хешу содержимого (BLAKE2).
+
+    Одинаковые загрузки сохраняются в один файл, а повторная загрузка
+    того же изображения не приводит к записи на диск. Содержимое файла
+    по имени никогда не меняется, поэтому его можно кешировать навсегда.
+
+    Файл сохраняется под блокировкой имени (см. `lock_name`), поэтому
+    сохранять его нужно в одной транзакции с записью, которая на него
+    ссылается.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = blake2b(digest_size=16)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest.hexdigest() + extension)
+        lock_name(name)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def is_referenced(name):
+    return any(
+        apps.get_model(model).objects.filter(**{field: name}).exists()
+        for model, field in REFERENCES
+    )
+
+
+def delete_if_orphaned(name):
+    if not name:
+        return
+    with transaction.atomic():
+        lock_name(name)
+        if is_referenced(name):
+            return
+        content_addressed_storage.delete(name)
+        for size in THUMBNAIL_SIZES:
+            content_addressed_storage.delete(get_thumbnail_name(name, size))
+
+
+def get_stored_name(instance, field):
+    """Имя файла, сохранённое в БД до изменения объекта."""
+    if instance.pk is None:
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values_list(
+        field, flat=True
+    ).first()
+
+
+def release(name):
+    """Удаление файла после фиксации, если на него больше нет ссылок."""
+    if name:
+        transaction.on_commit(lambda: delete_if_orphaned(name))
@@ -0,0 +1,116 @@
+"""Миниатюры изображений рецептов и аватаров.
+
+Миниатюры строятся вне цикла запроса исполнителем, заданным настройкой
+THUMBNAIL_EXECUTOR. Задача — функция `generate_thumbnails` с простыми
+аргументами, поэтому исполнитель на основе очереди задач может просто
+передавать её имя и аргументы внешнему воркеру.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps, features
+
+from core.constants import THUMBNAIL_QUALITY, THUMBNAIL_SIZES
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+THUMBNAIL_EXTENSION = {'WEBP': 'webp', 'JPEG': 'jpg'}[THUMBNAIL_FORMAT]
+
+
+def get_thumbnail_name(name, size):
+    """Путь миниатюры размера `size` для файла `name`.
+
+    Путь содержит имя оригинала целиком, чтобы веб-сервер мог отдать
+    оригинал, пока миниатюра не построена.
+    """
+    return f'thumbnails/{name}_{size}.{THUMBNAIL_EXTENSION}'
+
+
+def generate_thumbnails(name, sizes):
+    """Построение недостающих миниатюр с однократным чтением оригинала."""
+    missing = [size for size in sizes
+               if not default_storage.exists(get_thumbnail_name(name, size))]
+    if not missing:
+        return
+    with default_storage.open(name) as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA')
+    if THUMBNAIL_FORMAT == 'JPEG':
+        original = original.convert('RGB')
+    for size in missing:
+        image = original.copy()
+        image.thumbnail(THUMBNAIL_SIZES[size], Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+        default_storage.save(get_thumbnail_name(name, size),
+                             ContentFile(buffer.getvalue()))
+
+
+class BaseThumbnailExecutor:
+    """Интерфейс исполнителя задач построения миниатюр."""
+
+    def submit(self, name, sizes):
+        raise NotImplementedError
+
+
+class SyncThumbnailExecutor(BaseThumbnailExecutor):
+    """Построение миниатюр в текущем потоке."""
+
+    def submit(self, name, sizes):
+        generate_thumbnails(name, sizes)
+
+
+class ThreadPoolThumbnailExecutor(BaseThumbnailExecutor):
+    """Построение миниатюр в пуле потоков процесса."""
+
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails'
+        )
+
+    def submit(self, name, sizes):
+        future = self.pool.submit(generate_thumbnails, name, sizes)
+        future.add_done_callback(self.log_error)
+
+    @staticmethod
+    def log_error(future):
+        if future.exception() is not None:
+            logger.error('Thumbnail generation failed',
+                         exc_info=future.exception())
+
+
+executor = SimpleLazyObject(
+    lambda: import_string(settings.THUMBNAIL_EXECUTOR)()
+)
+
+
+def schedule_thumbnails(file, sizes):
+    """Постановка задачи после фиксации транзакции."""
+    if file:
+        name = file.name
+        transaction.on_commit(lambda: executor.submit(name, sizes))
+
+
+def get_thumbnail_url(file, size):
+    """URL миниатюры файла."""
+    return get_thumbnail_url_by_name(file.name, size)
+
+
+def get_thumbnail_url_by_name(name, size):
+    """URL миниатюры по имени оригинала.
+
+    Наличие файла не проверяется: пока миниатюра не готова, nginx
+    отдаёт по этому URL оригинал (см. infra/nginx.conf).
+    """
+    return default_storage.url(get_thumbnail_name(name, size))
@@ -3,7 +3,8 @@ from django.utils.safestring import mark_safe
 
 from core.constants import INGREDIENT_MIN_AMOUNT
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingListItem, Tag)
+from .search import update_search_index
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -59,10 +60,18 @@ class RecipeAdmin(admin.ModelAdmin):
         ),
     )
 
-    @admin.display(description='В избранном')
+    def save_related(self, request, form, formsets, change):
+        old_amounts = (form.instance.get_ingredient_amounts() if change
+                       else {})
+        super().save_related(request, form, formsets, change)
+        ShoppingListItem.objects.apply_recipe_change(form.instance,
+                                                     old_amounts)
+        update_search_index((form.instance.pk,))
+
+    @admin.display(description='В избранном', ordering='favorites_count')
     def in_favorites(self, recipe):
         """Число добавлений этого рецепта в избранное."""
-        return recipe.favorites.count()
+        return recipe.favorites_count
 
     @admin.display(description='Ингредиенты')
     def get_ingredients(self, recipe):
@@ -0,0 +1,133 @@
+import random
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+BATCH_SIZE = 10000
+ADJECTIVES = ('Домашний', 'Быстрый', 'Острый', 'Летний', 'Постный',
+              'Сырный', 'Пряный', 'Зимний', 'Деревенский', 'Праздничный')
+DISHES = ('борщ', 'салат', 'пирог', 'суп', 'плов', 'омлет', 'соус',
+          'кекс', 'рулет', 'гуляш', 'паштет', 'бульон')
+INGREDIENTS = ('мука', 'соль', 'сахар', 'молоко', 'масло', 'перец',
+               'лук', 'морковь', 'капуста', 'говядина', 'сыр', 'яйцо')
+UNITS = ('г', 'мл', 'шт.', 'ст. л.', 'ч. л.')
+SEQUENTIAL_SCAN = (
+    'SET LOCAL enable_indexscan = off',
+    'SET LOCAL enable_bitmapscan = off',
+    'SET LOCAL enable_indexonlyscan = off',
+)
+
+
+class Command(BaseCommand):
+    help = ('Планы и время поиска по названиям рецептов и ингредиентов '
+            '(istartswith, icontains) на синтетическом каталоге. '
+            'Только для PostgreSQL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries', nargs='*', default=('Дом', 'борщ', '№ 424242'),
+            help='Искомые строки.'
+        )
+        parser.add_argument('--recipes', type=int, default=1000000,
+                            help='Число синтетических рецептов, '
+                                 '0 — искать по имеющимся данным.')
+        parser.add_argument('--ingredients', type=int, default=100000,
+                            help='Число синтетических ингредиентов.')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Размер страницы выдачи.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Число повторов для замера времени.')
+        parser.add_argument('--keep', action='store_true',
+                            help='Сохранить синтетические данные.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def generate(self, options):
+        rng = random.Random(options['seed'])
+        start = perf_counter()
+        author, _ = User.objects.get_or_create(
+            username='name_search_benchmark',
+            defaults={'email': 'name_search_benchmark@example.com'}
+        )
+        for first in range(0, options['ingredients'], BATCH_SIZE):
+            Ingredient.objects.bulk_create(
+                Ingredient(name=f'{rng.choice(INGREDIENTS)} № {number}',
+                           measurement_unit=rng.choice(UNITS))
+                for number in range(
+                    first, min(first + BATCH_SIZE, options['ingredients'])
+                )
+            )
+        for first in range(0, options['recipes'], BATCH_SIZE):
+            Recipe.objects.bulk_create(
+                Recipe(author=author,
+                       name=(f'{rng.choice(ADJECTIVES)} '
+                             f'{rng.choice(DISHES)} № {number}'),
+                       text=' '.join(rng.choices(DISHES + INGREDIENTS,
+                                                 k=30)),
+                       cooking_time=rng.randint(1, 240),
+                       image='recipes/images/benchmark.png')
+                for number in range(
+                    first, min(first + BATCH_SIZE, options['recipes'])
+                )
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Ingredient._meta.db_table}')
+            cursor.execute(f'ANALYZE {Recipe._meta.db_table}')
+        self.stdout.write(
+            f'Generated {options["recipes"]} recipes and '
+            f'{options["ingredients"]} ingredients '
+            f'in {perf_counter() - start:.1f} s.'
+        )
+
+    @staticmethod
+    def measure(queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            list(queryset.all())
+            timings.append((perf_counter() - start) * 1000)
+        return min(timings), median(timings)
+
+    def run_case(self, label, queryset, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        for mode, statements in (('indexes', ()),
+                                 ('sequential scan', SEQUENTIAL_SCAN)):
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for statement in statements:
+                        cursor.execute(statement)
+                plan = queryset.explain(analyze=True)
+                best, middle = self.measure(queryset, repeat)
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f'  {mode}: min {best:.2f} ms, median {middle:.2f} ms'
+            )
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                'Benchmark requires PostgreSQL, skipped.'
+            ))
+            return
+        with transaction.atomic():
+            if options['recipes'] or options['ingredients']:
+                self.generate(options)
+            for query in options['queries']:
+                for model, ordering in ((Recipe, ('-created_at', '-id')),
+                                        (Ingredient, ('name',))):
+                    for lookup in ('istartswith', 'icontains'):
+                        queryset = model.objects.filter(
+                            **{f'name__{lookup}': query}
+                        ).order_by(*ordering).values_list('pk', flat=True)
+                        self.run_case(
+                            f'{model.__name__}.name__{lookup}={query!r}',
+                            queryset[:options['limit']], options['repeat']
+                        )
+            if not options['keep']:
+                transaction.set_rollback(True)
@@ -0,0 +1,80 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipes.models import Recipe
+from recipes.services import encode_short_url
+from recipes.views import CACHE_KEY, get_legacy_recipe_pk
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер перенаправлений /s/<slug>/ по новым '
+            'и старым коротким ссылкам с холодным и прогретым кэшем.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--links', type=int, default=1000,
+                            help='Число ссылок каждого вида.')
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Число проходов с прогретым кэшем.')
+
+    def get_slugs(self, limit):
+        recipes = Recipe.objects.order_by('pk')
+        return (
+            ('new', [encode_short_url(pk) for pk in
+                     recipes.values_list('pk', flat=True)[:limit]]),
+            ('legacy', list(recipes.exclude(short_url=None).values_list(
+                'short_url', flat=True
+            )[:limit])),
+        )
+
+    @staticmethod
+    def clear_caches(slugs):
+        get_legacy_recipe_pk.cache_clear()
+        if settings.SHORT_URL_CACHE:
+            caches[settings.SHORT_URL_CACHE].delete_many(
+                [CACHE_KEY.format(slug) for slug in slugs]
+            )
+
+    @staticmethod
+    def measure(client, urls, passes):
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(passes):
+                for url in urls:
+                    start = perf_counter()
+                    response = client.get(url)
+                    timings.append((perf_counter() - start) * 1000)
+                    if response.status_code != 301:
+                        raise CommandError(
+                            f'{url}: статус {response.status_code}.'
+                        )
+        return sorted(timings), len(queries)
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        for kind, slugs in self.get_slugs(options['links']):
+            if not slugs:
+                self.stdout.write(self.style.WARNING(
+                    f'No {kind} short links, skipped.'
+                ))
+                continue
+            urls = [reverse('redirect_to_original', args=(slug,))
+                    for slug in slugs]
+            self.clear_caches(slugs)
+            self.stdout.write(f'{kind}: {len(urls)} links')
+            for mode, passes in (('cold', 1), ('warm', options['repeat'])):
+                timings, queries = self.measure(client, urls, passes)
+                total = sum(timings)
+                self.stdout.write(
+                    f'  {mode}: {len(timings)} requests, '
+                    f'{len(timings) / total * 1000:.0f} req/s, '
+                    f'median {timings[len(timings) // 2]:.3f} ms, '
+                    f'p95 {timings[int(len(timings) * 0.95)]:.3f} ms, '
+                    f'{queries / len(timings):.2f} queries/request'
+                )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.thumbnails import SyncThumbnailExecutor
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Построение недостающих миниатюр рецептов и аватаров.'
+
+    def handle(self, *args, **options):
+        executor = SyncThumbnailExecutor()
+        for image in Recipe.objects.values_list('image', flat=True):
+            executor.submit(image, ('card', 'detail'))
+        for avatar in (User.objects.exclude(avatar='').exclude(avatar=None)
+                       .values_list('avatar', flat=True)):
+            executor.submit(avatar, ('avatar',))
+        self.stdout.write(self.style.SUCCESS('Thumbnails are ready!'))
@@ -4,6 +4,7 @@ import os
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from core.cache import bump_version
 from recipes.models import Ingredient
 
 
@@ -18,6 +19,7 @@ class Command(BaseCommand):
                      for name, unit in csv.reader(f)),
                     ignore_conflicts=True
                 )
+            bump_version(Ingredient._meta.label_lower)
             self.stdout.write(
                 self.style.SUCCESS('Successfully added ingredients!')
             )
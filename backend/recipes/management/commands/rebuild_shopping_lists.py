@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Пересборка и проверка сводных списков покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить списки, не изменяя их.'
+        )
+
+    def get_mismatches(self):
+        expected = {
+            (user_id, ingredient_id): total_amount
+            for user_id, ingredient_id, total_amount
+            in ShoppingListItem.objects.expected()
+        }
+        actual = {
+            (user_id, ingredient_id): total_amount
+            for user_id, ingredient_id, total_amount
+            in ShoppingListItem.objects.values_list(
+                'user_id', 'ingredient_id', 'total_amount')
+        }
+        return {
+            key for key in expected.keys() | actual.keys()
+            if expected.get(key) != actual.get(key)
+        }
+
+    @transaction.atomic
+    def rebuild(self):
+        ShoppingListItem.objects.all().delete()
+        ShoppingListItem.objects.bulk_create(
+            (ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                              total_amount=total_amount)
+             for user_id, ingredient_id, total_amount
+             in ShoppingListItem.objects.expected()),
+            batch_size=1000
+        )
+
+    def handle(self, *args, **options):
+        mismatches = self.get_mismatches()
+        if options['check']:
+            if mismatches:
+                self.stdout.write(self.style.ERROR(
+                    f'Lists are inconsistent: {len(mismatches)} items differ.'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS('Lists are consistent.'))
+            return
+        self.rebuild()
+        mismatches = self.get_mismatches()
+        if mismatches:
+            self.stdout.write(self.style.ERROR(
+                f'Rebuild failed: {len(mismatches)} items differ.'
+            ))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS('Successfully rebuilt shopping lists!')
+            )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.counters import count_related
+from recipes.models import Favorite, Recipe
+from users.models import Subscribe, User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscribe, 'author'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Сверка и исправление денормализованных счётчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить счётчики, не изменяя их.'
+        )
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            actual = count_related(related_model, related_field)
+            mismatches = list(
+                model.objects.annotate(actual=actual)
+                .exclude(**{field: F('actual')})
+                .values_list('pk', flat=True)
+            )
+            name = f'{model._meta.label}.{field}'
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{name} is consistent.'
+                ))
+                continue
+            if options['check']:
+                self.stdout.write(self.style.ERROR(
+                    f'{name} is inconsistent: {len(mismatches)} rows differ.'
+                ))
+                continue
+            model.objects.filter(pk__in=mismatches).update(**{field: actual})
+            self.stdout.write(self.style.SUCCESS(
+                f'{name} is fixed: {len(mismatches)} rows updated.'
+            ))
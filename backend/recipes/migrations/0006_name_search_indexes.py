@@ -0,0 +1,40 @@
+from django.db import migrations
+
+INDEXES = (
+    ('recipes_ingredient_name_upper_idx', 'recipes_ingredient',
+     'btree (UPPER(name) text_pattern_ops)'),
+    ('recipes_ingredient_name_trgm_idx', 'recipes_ingredient',
+     'gin (UPPER(name) gin_trgm_ops)'),
+    ('recipes_recipe_name_upper_idx', 'recipes_recipe',
+     'btree (UPPER(name) text_pattern_ops)'),
+    ('recipes_recipe_name_trgm_idx', 'recipes_recipe',
+     'gin (UPPER(name) gin_trgm_ops)'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, definition in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING {definition}'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
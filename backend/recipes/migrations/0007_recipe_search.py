@@ -0,0 +1,63 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARDS = (
+    'ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector',
+    'CREATE INDEX recipes_recipe_search_vector_idx '
+    'ON recipes_recipe USING gin (search_vector)',
+    '''
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector('russian', recipe.name), 'A')
+        || setweight(to_tsvector('russian', recipe.text), 'B')
+        || setweight(to_tsvector('russian', COALESCE((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS line
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = line.ingredient_id
+            WHERE line.recipe_id = recipe.id
+        ), '')), 'C')
+    ''',
+)
+POSTGRESQL_BACKWARDS = (
+    'ALTER TABLE recipes_recipe DROP COLUMN search_vector',
+)
+SQLITE_FORWARDS = (
+    'CREATE VIRTUAL TABLE recipes_recipe_fts '
+    'USING fts5(name, text, ingredients)',
+    '''
+    INSERT INTO recipes_recipe_fts (rowid, name, text, ingredients)
+    SELECT recipe.id, recipe.name, recipe.text, (
+        SELECT group_concat(ingredient.name, ' ')
+        FROM recipes_recipeingredient AS line
+        JOIN recipes_ingredient AS ingredient
+            ON ingredient.id = line.ingredient_id
+        WHERE line.recipe_id = recipe.id
+    )
+    FROM recipes_recipe AS recipe
+    ''',
+)
+SQLITE_BACKWARDS = (
+    'DROP TABLE recipes_recipe_fts',
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_name_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRESQL_FORWARDS,
+                 'sqlite': SQLITE_FORWARDS}),
+            run({'postgresql': POSTGRESQL_BACKWARDS,
+                 'sqlite': SQLITE_BACKWARDS}),
+        ),
+    ]
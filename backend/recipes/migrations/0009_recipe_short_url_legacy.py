@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_url',
+            field=models.CharField(blank=True, help_text='Заполнена только у рецептов со старыми ссылками.', max_length=10, null=True, unique=True, verbose_name='Короткая ссылка'),
+        ),
+    ]
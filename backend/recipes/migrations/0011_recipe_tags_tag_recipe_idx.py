@@ -0,0 +1,26 @@
+from django.db import migrations
+
+INDEX_NAME = 'recipes_recipe_tags_tag_recipe_idx'
+
+
+def create_index(apps, schema_editor):
+    table = apps.get_model('recipes', 'Recipe').tags.through._meta.db_table
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+        f'ON {table} (tag_id, recipe_id)'
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_favorites_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,13 +1,16 @@
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.expressions import RawSQL, Window
+from django.db.models.functions import Greatest, RowNumber
 
 from core.constants import (COOKING_MIN_TIME, INGREDIENT_MAX_LENGTH,
                             INGREDIENT_MIN_AMOUNT, MAX_POSITIVE_VALUE,
                             RECIPE_MAX_LENGTH, TAG_MAX_LENGTH,
                             SHORT_URL_MAX_LENGTH)
 from core.models import UserRecipeModel
-from .services import generate_short_url
+from core.storage import content_addressed_storage
+from .services import encode_short_url
 
 
 class Ingredient(models.Model):
@@ -59,6 +62,72 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet рецептов с подгрузкой связанных данных."""
+
+    @staticmethod
+    def related_lookups():
+        """Связи, необходимые для сериализации рецепта.
+
+        Теги и, при включённом INGREDIENT_INDEX, названия ингредиентов
+        берутся из каталога в памяти процесса, поэтому таблицы тегов
+        и ингредиентов не присоединяются.
+        """
+        ingredients = RecipeIngredient.objects.order_by('pk')
+        if not settings.INGREDIENT_INDEX:
+            ingredients = ingredients.select_related('ingredient')
+        return (
+            models.Prefetch('recipe_ingredients', queryset=ingredients),
+        )
+
+    def with_related(self):
+        """Автор и ингредиенты за постоянное число запросов."""
+        return self.select_related('author').prefetch_related(
+            *self.related_lookups()
+        )
+
+    def latest_per_author(self, author_ids, limit=None):
+        """Не более `limit` последних рецептов каждого автора одним запросом.
+
+        Рецепты нумеруются оконной функцией ROW_NUMBER() в разрезе автора,
+        что поддерживается и PostgreSQL, и SQLite.
+        """
+        if not author_ids:
+            return self.none()
+        queryset = self.filter(author_id__in=author_ids)
+        if limit is None:
+            return queryset
+        ranked = queryset.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=models.F('author_id'),
+                order_by=(models.F('created_at').desc(),
+                          models.F('id').desc())
+            )
+        ).order_by().values('id', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) ranked '
+            'WHERE ranked.row_number <= %s',
+            (*params, limit)
+        ))
+
+    def with_user_flags(self, user):
+        """Аннотация признаков избранного и корзины для пользователя."""
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorited=models.Exists(
+                Favorite.objects.filter(user=user,
+                                        recipe=models.OuterRef('pk'))
+            ),
+            is_in_shopping_cart=models.Exists(
+                ShoppingCart.objects.filter(user=user,
+                                            recipe=models.OuterRef('pk'))
+            )
+        )
+
+
 class Recipe(models.Model):
     """Модель рецептов"""
 
@@ -92,7 +161,8 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         'Картинка',
-        upload_to='recipes/'
+        upload_to='recipes/',
+        storage=content_addressed_storage
     )
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -107,24 +177,41 @@ class Recipe(models.Model):
         'Короткая ссылка',
         max_length=SHORT_URL_MAX_LENGTH,
         unique=True,
-        blank=True
+        blank=True,
+        null=True,
+        help_text='Заполнена только у рецептов со старыми ссылками.'
+    )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном', default=0, editable=False
     )
     created_at = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created_at',)
         default_related_name = 'recipes'
+        indexes = (
+            models.Index(fields=('-created_at', '-id'),
+                         name='recipe_created_at_id_idx'),
+        )
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
-    def save(self, *args, **kwargs):
-        if not self.short_url:
-            self.short_url = generate_short_url(self.__class__)
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return self.name
 
+    def get_short_url(self):
+        """Короткая ссылка рецепта."""
+        return self.short_url or encode_short_url(self.pk)
+
+    def get_ingredient_amounts(self):
+        """Количество каждого ингредиента в рецепте."""
+        return dict(
+            self.recipe_ingredients.values_list('ingredient_id', 'amount')
+        )
+
 
 class RecipeIngredient(models.Model):
     """Модель количества ингредиентов для рецепта."""
@@ -181,3 +268,97 @@ class ShoppingCart(UserRecipeModel):
         default_related_name = 'shopping_cart'
         verbose_name = 'Корзина'
         verbose_name_plural = verbose_name
+
+
+class ShoppingListQuerySet(models.QuerySet):
+    """QuerySet сводного списка покупок."""
+
+    @transaction.atomic
+    def apply_deltas(self, user_ids, deltas):
+        """Изменение количества ингредиентов в списках пользователей.
+
+        `deltas` — словарь {id ингредиента: изменение количества}.
+        Выполняется за постоянное число запросов. Недостающие строки
+        вставляются с нулевым количеством без ошибки при конфликте,
+        а количество меняется одним UPDATE, поэтому параллельные
+        добавления рецептов с общим новым ингредиентом не нарушают
+        ограничение уникальности.
+        """
+        deltas = {pk: deltas[pk] for pk in sorted(deltas) if deltas[pk]}
+        user_ids = sorted(user_ids)
+        if not deltas or not user_ids:
+            return
+        self.bulk_create(
+            (self.model(user_id=user_id, ingredient_id=pk, total_amount=0)
+             for user_id in user_ids
+             for pk, delta in deltas.items() if delta > 0),
+            ignore_conflicts=True
+        )
+        items = self.filter(user_id__in=user_ids, ingredient_id__in=deltas)
+        items.update(total_amount=Greatest(
+            models.F('total_amount') + models.Case(
+                *(models.When(ingredient_id=pk, then=models.Value(delta))
+                  for pk, delta in deltas.items()),
+                output_field=models.IntegerField()
+            ), 0
+        ))
+        items.filter(total_amount=0).delete()
+
+    def apply_recipe_change(self, recipe, old_amounts, new_amounts=None):
+        """Перенос изменения состава рецепта в списки покупок."""
+        if new_amounts is None:
+            new_amounts = recipe.get_ingredient_amounts()
+        if new_amounts == old_amounts:
+            return
+        self.apply_deltas(
+            recipe.shopping_cart.values_list('user_id', flat=True),
+            {pk: new_amounts.get(pk, 0) - old_amounts.get(pk, 0)
+             for pk in new_amounts.keys() | old_amounts.keys()}
+        )
+
+    def expected(self):
+        """Содержимое списков, вычисленное по корзинам пользователей."""
+        return (
+            RecipeIngredient.objects
+            .filter(recipe__shopping_cart__user__isnull=False)
+            .values_list('recipe__shopping_cart__user', 'ingredient')
+            .annotate(total_amount=models.Sum('amount'))
+            .order_by()
+        )
+
+
+class ShoppingListItem(models.Model):
+    """Сводный список покупок пользователя.
+
+    Денормализованная сумма ингредиентов из рецептов в корзине,
+    поддерживается при изменении корзины и состава рецептов.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.PositiveIntegerField('Количество')
+
+    objects = ShoppingListQuerySet.as_manager()
+
+    class Meta:
+        default_related_name = 'shopping_list'
+        verbose_name = 'Список покупок'
+        verbose_name_plural = verbose_name
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            ),
+        )
+
+    def __str__(self):
+        return (f'{self.user}: {self.ingredient.name} - '
+                f'{self.total_amount},{self.ingredient.measurement_unit}')
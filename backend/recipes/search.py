@@ -0,0 +1,92 @@
+"""Полнотекстовый поиск рецептов.
+
+На PostgreSQL используется столбец `search_vector` типа tsvector
+с русской конфигурацией и GIN-индексом, на SQLite — таблица FTS5.
+Оба индекса создаются миграцией и обновляются сигналами.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'recipes_recipe_fts'
+
+POSTGRESQL_UPDATE = '''
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector('russian', recipe.name), 'A')
+        || setweight(to_tsvector('russian', recipe.text), 'B')
+        || setweight(to_tsvector('russian', COALESCE((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS line
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = line.ingredient_id
+            WHERE line.recipe_id = recipe.id
+        ), '')), 'C')
+    WHERE recipe.id = ANY(%s)
+'''
+SQLITE_DELETE = f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({{}})'
+SQLITE_INSERT = f'''
+    INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients)
+    SELECT recipe.id, recipe.name, recipe.text, (
+        SELECT group_concat(ingredient.name, ' ')
+        FROM recipes_recipeingredient AS line
+        JOIN recipes_ingredient AS ingredient
+            ON ingredient.id = line.ingredient_id
+        WHERE line.recipe_id = recipe.id
+    )
+    FROM recipes_recipe AS recipe WHERE recipe.id IN ({{}})
+'''
+
+POSTGRESQL_QUERY = "websearch_to_tsquery('russian', %s)"
+POSTGRESQL_MATCH = (
+    f'SELECT id FROM recipes_recipe WHERE search_vector @@ {POSTGRESQL_QUERY}'
+)
+POSTGRESQL_RANK = f'ts_rank(recipes_recipe.search_vector, {POSTGRESQL_QUERY})'
+SQLITE_MATCH = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+SQLITE_RANK = (
+    f'(SELECT -bm25({FTS_TABLE}, 10.0, 4.0, 1.0) FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE} MATCH %s AND rowid = recipes_recipe.id)'
+)
+
+
+def update_search_index(recipe_ids):
+    """Пересчёт поискового индекса для рецептов."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(POSTGRESQL_UPDATE, (recipe_ids,))
+        elif connection.vendor == 'sqlite':
+            placeholders = ', '.join(['%s'] * len(recipe_ids))
+            cursor.execute(SQLITE_DELETE.format(placeholders), recipe_ids)
+            cursor.execute(SQLITE_INSERT.format(placeholders), recipe_ids)
+
+
+def delete_from_search_index(recipe_id):
+    """Удаление рецепта из индекса FTS5; на PostgreSQL не требуется."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(SQLITE_DELETE.format('%s'), (recipe_id,))
+
+
+def get_fts_query(query):
+    """Запрос FTS5 из слов поисковой строки без спецсимволов."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def search(queryset, query):
+    """Рецепты, подходящие под запрос, в порядке релевантности."""
+    if connection.vendor == 'postgresql':
+        match, rank, params = POSTGRESQL_MATCH, POSTGRESQL_RANK, (query,)
+    elif connection.vendor == 'sqlite':
+        fts_query = get_fts_query(query)
+        if not fts_query:
+            return queryset.none()
+        match, rank, params = SQLITE_MATCH, SQLITE_RANK, (fts_query,)
+    else:
+        return queryset.filter(name__icontains=query)
+    return queryset.filter(pk__in=RawSQL(match, params)).annotate(
+        search_rank=RawSQL(rank, params, output_field=FloatField())
+    ).order_by('-search_rank', '-created_at', '-id')
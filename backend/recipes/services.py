@@ -1,11 +1,50 @@
-from django.utils.crypto import get_random_string
+from core.constants import (SHORT_URL_ALPHABET, SHORT_URL_BITS,
+                            SHORT_URL_LENGTH, SHORT_URL_ROUND_KEYS)
 
-from core.constants import SHORT_URL_LENGTH
+HALF_BITS = SHORT_URL_BITS // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+BASE = len(SHORT_URL_ALPHABET)
+ALPHABET_INDEX = {char: index for index, char in enumerate(SHORT_URL_ALPHABET)}
 
 
-def generate_short_url(model):
-    """Генерация уникальной короткой ссылки для рецепта."""
-    while True:
-        short_url = get_random_string(SHORT_URL_LENGTH)
-        if not model.objects.filter(short_url=short_url).exists():
-            return short_url
+def _round(half, key):
+    """Раундовая функция сети Фейстеля."""
+    return ((half ^ key) * 0x9E3779B1 >> 7) & HALF_MASK
+
+
+def _permute(value, keys):
+    """Обратимая перестановка числа в диапазоне SHORT_URL_BITS бит."""
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for key in keys:
+        left, right = right, left ^ _round(right, key)
+    return right << HALF_BITS | left
+
+
+def encode_short_url(pk):
+    """Короткая ссылка рецепта, однозначно вычисляемая по первичному ключу.
+
+    Ключ перемешивается сетью Фейстеля, чтобы соседние рецепты
+    не получали похожих ссылок, и кодируется в base62.
+    """
+    if not 0 <= pk < 1 << SHORT_URL_BITS:
+        raise ValueError(f'Первичный ключ {pk} вне допустимого диапазона.')
+    value = _permute(pk, SHORT_URL_ROUND_KEYS)
+    chars = []
+    for _ in range(SHORT_URL_LENGTH):
+        value, index = divmod(value, BASE)
+        chars.append(SHORT_URL_ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+def decode_short_url(slug):
+    """Первичный ключ рецепта по короткой ссылке."""
+    if len(slug) != SHORT_URL_LENGTH:
+        raise ValueError(f'Некорректная короткая ссылка {slug}.')
+    value = 0
+    for char in slug:
+        if char not in ALPHABET_INDEX:
+            raise ValueError(f'Некорректная короткая ссылка {slug}.')
+        value = value * BASE + ALPHABET_INDEX[char]
+    if value >> SHORT_URL_BITS:
+        raise ValueError(f'Некорректная короткая ссылка {slug}.')
+    return _permute(value, reversed(SHORT_URL_ROUND_KEYS))
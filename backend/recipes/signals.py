@@ -0,0 +1,84 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from core.counters import connect_counter
+from core.storage import get_stored_name, release
+from core.thumbnails import schedule_thumbnails
+from users.models import User
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, ShoppingListItem)
+from .search import delete_from_search_index, update_search_index
+
+connect_counter(Favorite, 'recipe', Recipe, 'favorites_count')
+connect_counter(Recipe, 'author', User, 'recipes_count')
+
+
+def get_recipe_amounts(recipe_id, sign=1):
+    return {
+        pk: sign * amount for pk, amount
+        in RecipeIngredient.objects.filter(recipe_id=recipe_id)
+        .values_list('ingredient_id', 'amount')
+    }
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Добавление ингредиентов рецепта в список покупок."""
+    if created:
+        ShoppingListItem.objects.apply_deltas(
+            (instance.user_id,), get_recipe_amounts(instance.recipe_id)
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    """Вычитание ингредиентов рецепта из списка покупок."""
+    ShoppingListItem.objects.apply_deltas(
+        (instance.user_id,), get_recipe_amounts(instance.recipe_id, -1)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    """Обновление поискового индекса рецепта."""
+    update_search_index((instance.pk,))
+
+
+@receiver(post_save, sender=Recipe)
+def make_recipe_thumbnails(sender, instance, **kwargs):
+    """Построение миниатюр изображения рецепта."""
+    schedule_thumbnails(instance.image, ('card', 'detail'))
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    """Удаление рецепта из поискового индекса."""
+    delete_from_search_index(instance.pk)
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_recipes(sender, instance, created, **kwargs):
+    """Обновление индекса рецептов с переименованным ингредиентом."""
+    if not created:
+        update_search_index(
+            instance.recipes.values_list('pk', flat=True)
+        )
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_image(sender, instance, **kwargs):
+    instance.previous_image = get_stored_name(instance, 'image')
+
+
+@receiver(post_save, sender=Recipe)
+def release_replaced_image(sender, instance, **kwargs):
+    """Удаление заменённого изображения, если оно больше не используется."""
+    if instance.previous_image != instance.image.name:
+        release(instance.previous_image)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image(sender, instance, **kwargs):
+    """Удаление изображения удалённого рецепта."""
+    release(instance.image.name)
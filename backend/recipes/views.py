@@ -1,9 +1,55 @@
-from django.shortcuts import get_object_or_404, redirect
+from functools import lru_cache
 
+from django.conf import settings
+from django.core.cache import caches
+from django.http import Http404, HttpResponsePermanentRedirect
+from django.utils.cache import patch_cache_control
+
+from core.constants import (SHORT_URL_CACHE_TIMEOUT, SHORT_URL_LRU_SIZE,
+                            SHORT_URL_REDIRECT_MAX_AGE)
 from .models import Recipe
+from .services import decode_short_url
+
+CACHE_KEY = 'short_url:{}'
+
+
+@lru_cache(maxsize=SHORT_URL_LRU_SIZE)
+def get_legacy_recipe_pk(slug):
+    """Первичный ключ рецепта по старой короткой ссылке.
+
+    Старые ссылки не меняются, поэтому результат кэшируется в процессе
+    и, если задан SHORT_URL_CACHE, в общем кэше. Ненайденные ссылки
+    не кэшируются.
+    """
+    cache = None
+    if settings.SHORT_URL_CACHE:
+        cache = caches[settings.SHORT_URL_CACHE]
+    key = CACHE_KEY.format(slug)
+    pk = cache.get(key) if cache else None
+    if pk is None:
+        pk = Recipe.objects.filter(short_url=slug).values_list(
+            'pk', flat=True
+        ).first()
+        if pk is None:
+            raise Http404
+        if cache:
+            cache.set(key, pk, SHORT_URL_CACHE_TIMEOUT)
+    return pk
 
 
 def redirect_to_original(request, slug):
-    """Перенаправление с короткой ссылки на оригинальную."""
-    recipe = get_object_or_404(Recipe, short_url=slug)
-    return redirect(f'/recipes/{recipe.pk}/')
+    """Перенаправление с короткой ссылки на оригинальную.
+
+    Первичный ключ вычисляется из ссылки без обращения к базе;
+    по таблице ищутся только старые ссылки другой длины.
+    Соответствие ссылки рецепту не меняется, поэтому ответ постоянный
+    и кэшируется браузерами и прокси.
+    """
+    try:
+        pk = decode_short_url(slug)
+    except ValueError:
+        pk = get_legacy_recipe_pk(slug)
+    response = HttpResponsePermanentRedirect(f'/recipes/{pk}/')
+    patch_cache_control(response, public=True,
+                        max_age=SHORT_URL_REDIRECT_MAX_AGE)
+    return response
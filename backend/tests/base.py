@@ -0,0 +1,83 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Subscribe, User
+
+RECIPES = 12
+BIG_RECIPE_INGREDIENTS = 10
+
+
+def create_user(name, avatar=''):
+    return User.objects.create_user(
+        username=name, email=f'{name}@example.com', password='password',
+        first_name=name.title(), last_name='Тестов', avatar=avatar
+    )
+
+
+def create_recipe(author, name, tags=(), ingredients=()):
+    recipe = Recipe.objects.create(
+        author=author, name=name, text=f'Как готовить: {name}.',
+        cooking_time=10, image=f'recipes/images/{name}.png'
+    )
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                         amount=10 + number)
+        for number, ingredient in enumerate(ingredients)
+    )
+    return recipe
+
+
+class FoodgramTestCase(TestCase):
+    """Общие данные: авторы с рецептами и читатель с подписками,
+    избранным и корзиной.
+
+    У части пользователей нет аватара, у части рецептов нет тегов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = [
+            Tag.objects.create(name=name, slug=slug)
+            for name, slug in (('Завтрак', 'breakfast'), ('Обед', 'lunch'),
+                               ('Ужин', 'dinner'))
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'Мука {number}',
+                                      measurement_unit='г')
+            for number in range(BIG_RECIPE_INGREDIENTS)
+        ] + [Ingredient.objects.create(name='Соль', measurement_unit='г')]
+        cls.authors = [
+            create_user(f'author{number}',
+                        avatar=f'users/author{number}.png' if number % 2
+                        else '')
+            for number in range(4)
+        ]
+        cls.reader = create_user('reader', avatar='users/reader.png')
+        cls.recipes = [
+            create_recipe(
+                cls.authors[number % len(cls.authors)], f'Рецепт {number}',
+                tags=cls.tags[:2] if number % 3 else (),
+                ingredients=cls.ingredients[number % 3:number % 3 + 3]
+            )
+            for number in range(RECIPES)
+        ]
+        cls.big_recipe = create_recipe(
+            cls.authors[0], 'Большой рецепт', tags=cls.tags,
+            ingredients=cls.ingredients[:BIG_RECIPE_INGREDIENTS]
+        )
+        for author in cls.authors[:3]:
+            Subscribe.objects.create(user=cls.reader, author=author)
+        for recipe in cls.recipes[:2]:
+            Favorite.objects.create(user=cls.reader, recipe=recipe)
+        for recipe in cls.recipes[1:4]:
+            ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
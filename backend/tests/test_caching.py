@@ -0,0 +1,120 @@
+import gzip
+import json
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.catalog import TAGS
+from core.cache import bump_version
+from recipes.models import Favorite, Ingredient, Tag
+from tests.base import FoodgramTestCase
+
+
+class ConditionalGetTests(FoodgramTestCase):
+    """ETag меняется вместе с данными, которые попадают в ответ."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = APIClient()
+        self.author.force_authenticate(self.authors[1])
+
+    def assertModified(self, client, url, change):
+        response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        etag = response['ETag']
+        self.assertEqual(
+            client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED
+        )
+        change()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response
+
+    def test_favorites_count(self):
+        recipe = self.recipes[5]
+        for url in ('/api/recipes/?limit=100',
+                    f'/api/recipes/?limit=100&author={recipe.author_id}',
+                    '/api/recipes/?limit=100&tags=lunch',
+                    f'/api/recipes/{recipe.pk}/'):
+            for user, client in (('reader', self.client),
+                                 ('anonymous', self.anonymous)):
+                with self.subTest(url=url, user=user):
+                    Favorite.objects.filter(recipe=recipe).delete()
+                    self.assertModified(
+                        client, url,
+                        lambda: self.author.post(
+                            f'/api/recipes/{recipe.pk}/favorite/'
+                        )
+                    )
+
+    @staticmethod
+    def import_ingredient():
+        """Загрузка без сигналов моделей, как в load_data."""
+        Ingredient.objects.bulk_create(
+            (Ingredient(name='Сахар', measurement_unit='г'),)
+        )
+        bump_version(Ingredient._meta.label_lower)
+
+    @staticmethod
+    def import_tag():
+        Tag.objects.bulk_create((Tag(name='Десерт', slug='dessert'),))
+        bump_version(TAGS)
+
+    def test_ingredients_import(self):
+        for ingredient_index in (True, False):
+            with self.subTest(ingredient_index=ingredient_index), \
+                    override_settings(INGREDIENT_INDEX=ingredient_index):
+                Ingredient.objects.filter(name='Сахар').delete()
+                response = self.assertModified(
+                    self.anonymous, '/api/ingredients/',
+                    self.import_ingredient
+                )
+                self.assertEqual(len(response.json()),
+                                 Ingredient.objects.count())
+
+    def test_load_data(self):
+        self.assertModified(
+            self.anonymous, '/api/ingredients/?name=Соль',
+            lambda: call_command('load_data', stdout=StringIO())
+        )
+
+    def test_tags_import(self):
+        response = self.assertModified(self.anonymous, '/api/tags/',
+                                       self.import_tag)
+        self.assertEqual(len(response.json()), len(self.tags) + 1)
+
+
+class AnonymousCacheTests(FoodgramTestCase):
+    """Кешированный ответ не отдаётся запросу к другому хосту или схеме."""
+
+    def get_data(self, url, host, **extra):
+        response = self.anonymous.get(url, HTTP_HOST=host, **extra)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        content = response.content
+        if response.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        return json.loads(content)
+
+    def test_absolute_urls(self):
+        recipe = self.recipes[0]
+        for url, get_link in (
+            ('/api/recipes/?limit=1', lambda data: data['next']),
+            ('/api/recipes/?limit=1',
+             lambda data: data['results'][0]['image']),
+            (f'/api/recipes/{recipe.pk}/', lambda data: data['image']),
+        ):
+            for extra in ({}, {'HTTP_ACCEPT_ENCODING': 'gzip'}):
+                with self.subTest(url=url, extra=extra):
+                    self.assertTrue(get_link(self.get_data(
+                        url, 'localhost', **extra
+                    )).startswith('http://localhost/'))
+                    self.assertTrue(get_link(self.get_data(
+                        url, '127.0.0.1', **extra
+                    )).startswith('http://127.0.0.1/'))
+                    self.assertTrue(get_link(self.get_data(
+                        url, 'localhost', secure=True, **extra
+                    )).startswith('https://localhost/'))
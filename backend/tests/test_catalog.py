@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+from django.test import override_settings
+
+from api.catalog import ingredient_index, tag_index
+from core.constants import CATALOG_CHECK_INTERVAL
+from recipes.models import Ingredient, Tag
+from tests.base import FoodgramTestCase
+
+
+@override_settings(INGREDIENT_INDEX=True)
+class CatalogFingerprintTests(FoodgramTestCase):
+    """Каталог в памяти видит загрузку из другого процесса без общего кеша.
+
+    Загрузка из другого процесса меняет версию только в его кеше, здесь
+    она имитируется вставкой через bulk_create без смены версии.
+    """
+
+    def assertReloaded(self, index, url, create):
+        index.get_state()
+        response = self.anonymous.get(url)
+        etag = response['ETag']
+        create()
+        self.assertEqual(
+            self.anonymous.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED
+        )
+        index.checked_at -= CATALOG_CHECK_INTERVAL
+        response = self.anonymous.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.json()
+
+    def test_ingredients(self):
+        data = self.assertReloaded(
+            ingredient_index, '/api/ingredients/',
+            lambda: Ingredient.objects.bulk_create(
+                (Ingredient(name='Сахар', measurement_unit='г'),)
+            )
+        )
+        self.assertEqual(len(data), Ingredient.objects.count())
+
+    def test_tags(self):
+        data = self.assertReloaded(
+            tag_index, '/api/tags/',
+            lambda: Tag.objects.bulk_create(
+                (Tag(name='Десерт', slug='dessert'),)
+            )
+        )
+        self.assertIn('dessert', [tag['slug'] for tag in data])
@@ -0,0 +1,125 @@
+import gzip
+from unittest import mock, skipIf
+
+from django.utils.text import compress_sequence, compress_string
+
+from core import middleware
+from core.constants import COMPRESSION_MIN_SIZE
+from tests.base import FoodgramTestCase
+
+GZIP = {'HTTP_ACCEPT_ENCODING': 'gzip, deflate'}
+
+
+class CompressionTests(FoodgramTestCase):
+    """Сжатие ответов CompressionMiddleware."""
+
+    def patch_gzip(self):
+        compress = mock.Mock(side_effect=compress_string)
+        return compress, mock.patch.dict(
+            middleware.ENCODINGS, {'gzip': (compress, compress_sequence)}
+        )
+
+    def test_gzip_round_trip(self):
+        url = '/api/recipes/?limit=100'
+        plain = self.anonymous.get(url)
+        response = self.anonymous.get(url, **GZIP)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_not_accepted(self):
+        for accept_encoding in ('', 'identity', 'gzip;q=0'):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.anonymous.get(
+                    '/api/recipes/?limit=100',
+                    HTTP_ACCEPT_ENCODING=accept_encoding
+                )
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_response_not_compressed(self):
+        response = self.anonymous.get(f'/api/tags/{self.tags[0].pk}/',
+                                      **GZIP)
+        self.assertLess(len(response.content), COMPRESSION_MIN_SIZE)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_download(self):
+        for file_type in ('txt', 'csv'):
+            with self.subTest(file_type=file_type):
+                url = f'/api/recipes/download_shopping_cart/?type={file_type}'
+                plain = b''.join(self.client.get(url).streaming_content)
+                response = self.client.get(url, **GZIP)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertFalse(response.has_header('Content-Length'))
+                self.assertEqual(
+                    gzip.decompress(b''.join(response.streaming_content)),
+                    plain
+                )
+
+    def test_cached_variant_reused(self):
+        url = '/api/recipes/?limit=100'
+        compress, patch = self.patch_gzip()
+        with patch:
+            first = self.anonymous.get(url, **GZIP)
+            self.assertEqual(compress.call_count, 1)
+            second = self.anonymous.get(url, **GZIP)
+            self.assertEqual(compress.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+
+    def test_html_not_cached(self):
+        compress, patch = self.patch_gzip()
+        with patch:
+            for _ in range(2):
+                response = self.anonymous.get('/api/recipes/?limit=100',
+                                              HTTP_ACCEPT='text/html', **GZIP)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(compress.call_count, 2)
+
+    def test_conditional_get(self):
+        url = f'/api/recipes/{self.big_recipe.pk}/'
+        response = self.client.get(url, **GZIP)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'],
+                                   **GZIP)
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_encoding(self):
+        encodings = {'br': None, 'gzip': None}
+        with mock.patch.object(middleware, 'ENCODINGS', encodings):
+            for accept_encoding, expected in (
+                ('gzip, br', 'br'),
+                ('br;q=0.5, gzip', 'gzip'),
+                ('*', 'br'),
+                ('*;q=0, gzip', 'gzip'),
+                ('br;q=0.5', 'br'),
+                ('deflate', None),
+                ('', None),
+            ):
+                with self.subTest(accept_encoding=accept_encoding):
+                    self.assertEqual(middleware.get_encoding(accept_encoding),
+                                     expected)
+
+    def test_get_encoding_without_brotli(self):
+        with mock.patch.object(middleware, 'ENCODINGS', {'gzip': None}):
+            for accept_encoding, expected in (
+                ('br;q=0.5', None),
+                ('gzip, br', 'gzip'),
+                ('*', 'gzip'),
+            ):
+                with self.subTest(accept_encoding=accept_encoding):
+                    self.assertEqual(middleware.get_encoding(accept_encoding),
+                                     expected)
+
+    @skipIf(middleware.brotli is None, 'brotli is not installed')
+    def test_brotli_round_trip(self):
+        url = '/api/recipes/?limit=100'
+        plain = self.anonymous.get(url)
+        response = self.anonymous.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content),
+                         plain.content)
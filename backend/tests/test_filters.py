@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import override_settings
+
+from recipes.models import Recipe
+from tests.base import FoodgramTestCase
+
+
+class TagFilterTests(FoodgramTestCase):
+    """Рецепт с несколькими запрошенными тегами выдаётся один раз."""
+
+    def get_expected_ids(self, slugs):
+        return set(Recipe.objects.filter(
+            tags__slug__in=slugs
+        ).values_list('pk', flat=True))
+
+    def test_no_duplicates(self):
+        slugs = ('breakfast', 'lunch')
+        expected = self.get_expected_ids(slugs)
+        self.assertTrue(Recipe.objects.filter(
+            pk__in=expected, tags__slug='breakfast'
+        ).filter(tags__slug='lunch').exists())
+        for fast in (True, False):
+            for user, client in (('reader', self.client),
+                                 ('anonymous', self.anonymous)):
+                with self.subTest(fast=fast, user=user), \
+                        override_settings(FAST_SERIALIZERS=fast):
+                    cache.clear()
+                    data = client.get(
+                        '/api/recipes/?tags=breakfast&tags=lunch&limit=100'
+                    ).json()
+                    ids = [recipe['id'] for recipe in data['results']]
+                    self.assertEqual(len(ids), len(set(ids)))
+                    self.assertEqual(set(ids), expected)
+                    self.assertEqual(data['count'], len(expected))
+
+    def test_no_duplicates_across_pages(self):
+        expected = self.get_expected_ids(('breakfast', 'lunch'))
+        for url in ('/api/recipes/?tags=breakfast&tags=lunch&limit=2',
+                    '/api/recipes/?tags=breakfast&tags=lunch&limit=2'
+                    '&cursor='):
+            with self.subTest(url=url):
+                ids = []
+                while url:
+                    data = self.client.get(url).json()
+                    ids += [recipe['id'] for recipe in data['results']]
+                    url = data['next']
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(set(ids), expected)
+
+    def test_single_tag(self):
+        data = self.client.get('/api/recipes/?tags=dinner').json()
+        self.assertEqual([recipe['id'] for recipe in data['results']],
+                         [self.big_recipe.pk])
+        self.assertEqual(data['count'], 1)
@@ -0,0 +1,286 @@
+import base64
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import BytesIO
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.catalog import ingredient_index, tag_index
+from recipes.models import ShoppingCart
+from tests.base import BIG_RECIPE_INGREDIENTS, FoodgramTestCase
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def get_image():
+    buffer = BytesIO()
+    Image.new('RGB', (2, 2), 'red').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryCountTests(FoodgramTestCase):
+    """Число SQL-запросов эндпоинтов API не зависит от размера выдачи.
+
+    Каждый запрос выполняется с пустым кешем ответов и прогретым
+    каталогом тегов и ингредиентов в памяти процесса. Запрос на каждую
+    строку выдачи меняет число запросов между малой и большой страницей,
+    и тест падает. Запросы на запись сравниваются для рецептов с одним
+    и многими ингредиентами и откатываются после замера.
+    """
+
+    queries = {
+        'recipe_list': 5,
+        'anonymous_recipe_list': 4,
+        'recipe_list_by_author': 6,
+        'recipe_feed': 4,
+        'recipe_detail': 5,
+        'user_list': 3,
+        'anonymous_user_list': 2,
+        'user_detail': 2,
+        'me': 1,
+        'subscriptions': 4,
+        'tags': 0,
+        'ingredients': 0,
+        'shopping_cart': 2,
+        'get_link': 1,
+        'recipe_create': 19,
+        'recipe_update': 26,
+        'favorite_create': 8,
+        'favorite_delete': 6,
+        'shopping_cart_create': 11,
+        'shopping_cart_delete': 8,
+        'subscribe': 8,
+        'unsubscribe': 4,
+        'avatar_update': 6,
+        'avatar_delete': 4,
+    }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        self.author = APIClient()
+        self.author.force_authenticate(self.recipes[1].author)
+
+    def reset_caches(self):
+        cache.clear()
+        tag_index.get_state()
+        ingredient_index.get_state()
+
+    def assertQueries(self, name, urls, client=None):
+        client = client or self.client
+        for url in urls:
+            with self.subTest(url=url):
+                self.reset_caches()
+                with self.assertNumQueries(self.queries[name]):
+                    response = client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def assertWriteQueries(self, name, requests, client=None):
+        client = client or self.client
+        for method, url, data, status in requests:
+            with self.subTest(method=method, url=url):
+                self.reset_caches()
+                with transaction.atomic():
+                    with self.assertNumQueries(self.queries[name]):
+                        response = getattr(client, method)(url, data,
+                                                           format='json')
+                    transaction.set_rollback(True)
+                self.assertEqual(response.status_code, status, response.data)
+
+    def get_recipe_data(self, ingredients):
+        return {
+            'ingredients': [{'id': ingredient.pk, 'amount': 5}
+                            for ingredient in ingredients],
+            'tags': [self.tags[0].pk],
+            'name': 'Новый рецепт',
+            'text': 'Как готовить.',
+            'cooking_time': 5,
+        }
+
+    def test_recipe_list(self):
+        for params in ('', '&tags=breakfast&tags=lunch', '&is_favorited=1',
+                       '&is_in_shopping_cart=1'):
+            self.assertQueries('recipe_list', (
+                f'/api/recipes/?limit=1{params}',
+                f'/api/recipes/?limit=10{params}',
+            ))
+
+    def test_recipe_list_by_author(self):
+        author = self.authors[0].pk
+        self.assertQueries('recipe_list_by_author', (
+            f'/api/recipes/?limit=1&author={author}',
+            f'/api/recipes/?limit=10&author={author}',
+        ))
+
+    def test_anonymous_recipe_list(self):
+        self.assertQueries('anonymous_recipe_list', (
+            '/api/recipes/?limit=1', '/api/recipes/?limit=10',
+        ), client=self.anonymous)
+
+    def test_recipe_feed(self):
+        self.assertQueries('recipe_feed', (
+            '/api/recipes/?cursor=&limit=1', '/api/recipes/?cursor=&limit=10',
+        ))
+
+    def test_recipe_detail(self):
+        self.assertQueries('recipe_detail', (
+            f'/api/recipes/{self.recipes[0].pk}/',
+            f'/api/recipes/{self.big_recipe.pk}/',
+        ))
+
+    def test_user_list(self):
+        self.assertQueries('user_list', (
+            '/api/users/?limit=1', '/api/users/?limit=5',
+        ))
+
+    def test_anonymous_user_list(self):
+        self.assertQueries('anonymous_user_list', (
+            '/api/users/?limit=1', '/api/users/?limit=5',
+        ), client=self.anonymous)
+
+    def test_user_detail(self):
+        self.assertQueries('user_detail', (
+            f'/api/users/{self.authors[0].pk}/',
+            f'/api/users/{self.authors[1].pk}/',
+        ))
+
+    def test_me(self):
+        self.assertQueries('me', ('/api/users/me/',))
+
+    def test_subscriptions(self):
+        self.assertQueries('subscriptions', (
+            '/api/users/subscriptions/?limit=1',
+            '/api/users/subscriptions/?limit=3',
+            '/api/users/subscriptions/?limit=3&recipes_limit=1',
+        ))
+
+    def test_tags(self):
+        self.assertQueries('tags', (
+            '/api/tags/', f'/api/tags/{self.tags[0].pk}/',
+        ))
+
+    def test_ingredients(self):
+        self.assertQueries('ingredients', (
+            '/api/ingredients/?name=Соль', '/api/ingredients/?name=Мука',
+            f'/api/ingredients/{self.ingredients[0].pk}/',
+        ))
+
+    def test_shopping_cart_download(self):
+        urls = ('/api/recipes/download_shopping_cart/',
+                '/api/recipes/download_shopping_cart/?type=csv')
+        self.assertQueries('shopping_cart', urls)
+        for recipe in self.recipes[4:]:
+            ShoppingCart.objects.create(user=self.reader, recipe=recipe)
+        self.assertQueries('shopping_cart', urls)
+
+    def test_get_link(self):
+        self.assertQueries('get_link', (
+            f'/api/recipes/{self.big_recipe.pk}/get-link/',
+        ))
+
+    def test_recipe_create(self):
+        self.assertWriteQueries('recipe_create', (
+            ('post', '/api/recipes/',
+             {**self.get_recipe_data(ingredients), 'image': get_image()},
+             HTTPStatus.CREATED)
+            for ingredients in (self.ingredients[:1],
+                                self.ingredients[:BIG_RECIPE_INGREDIENTS])
+        ), client=self.author)
+
+    def test_recipe_update(self):
+        """Рецепт из корзины читателя: меняется количество одного
+        ингредиента, остальные удаляются, добавляются новые."""
+        recipe = self.recipes[1]
+        kept, *_ = recipe.ingredients.order_by('pk')
+        new = [ingredient for ingredient in self.ingredients
+               if not recipe.ingredients.filter(pk=ingredient.pk).exists()]
+        requests = []
+        for added in (new[:1], new):
+            data = self.get_recipe_data(added)
+            data['ingredients'].append({'id': kept.pk, 'amount': 99})
+            requests.append(('patch', f'/api/recipes/{recipe.pk}/', data,
+                             HTTPStatus.OK))
+        self.assertWriteQueries('recipe_update', requests,
+                                client=self.author)
+
+    def test_favorite(self):
+        self.assertWriteQueries('favorite_create', (
+            ('post', f'/api/recipes/{self.recipes[6].pk}/favorite/', None,
+             HTTPStatus.CREATED),
+        ))
+        self.assertWriteQueries('favorite_delete', (
+            ('delete', f'/api/recipes/{self.recipes[0].pk}/favorite/', None,
+             HTTPStatus.NO_CONTENT),
+        ))
+
+    def test_shopping_cart(self):
+        self.assertWriteQueries('shopping_cart_create', (
+            ('post', f'/api/recipes/{recipe.pk}/shopping_cart/', None,
+             HTTPStatus.CREATED)
+            for recipe in (self.recipes[6], self.big_recipe)
+        ))
+        self.assertWriteQueries('shopping_cart_delete', (
+            ('delete', f'/api/recipes/{self.recipes[1].pk}/shopping_cart/',
+             None, HTTPStatus.NO_CONTENT),
+        ))
+
+    def test_subscribe(self):
+        self.assertWriteQueries('subscribe', (
+            ('post', f'/api/users/{self.authors[3].pk}/subscribe/', None,
+             HTTPStatus.CREATED),
+        ))
+        self.assertWriteQueries('unsubscribe', (
+            ('delete', f'/api/users/{self.authors[0].pk}/subscribe/', None,
+             HTTPStatus.NO_CONTENT),
+        ))
+
+    def test_avatar(self):
+        self.assertWriteQueries('avatar_update', (
+            ('put', '/api/users/me/avatar/', {'avatar': get_image()},
+             HTTPStatus.OK),
+        ))
+        self.assertWriteQueries('avatar_delete', (
+            ('delete', '/api/users/me/avatar/', None,
+             HTTPStatus.NO_CONTENT),
+        ))
+
+    def test_cached_token_authentication(self):
+        token = Token.objects.create(user=self.reader)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.reset_caches()
+        client.get('/api/users/me/')
+        with self.assertNumQueries(self.queries['me']):
+            client.get('/api/users/me/')
+
+    def test_cached_anonymous_responses(self):
+        for url, number in (('/api/recipes/?limit=10', 0),
+                            (f'/api/recipes/{self.big_recipe.pk}/', 1)):
+            with self.subTest(url=url):
+                self.anonymous.get(url)
+                with self.assertNumQueries(number):
+                    self.anonymous.get(url)
+
+
+@override_settings(FAST_SERIALIZERS=False, INGREDIENT_INDEX=False)
+class SerializerQueryCountTests(QueryCountTests):
+    """Те же проверки для сериализаторов DRF без каталога ингредиентов."""
+
+    queries = {
+        **QueryCountTests.queries,
+        'ingredients': 1,
+    }
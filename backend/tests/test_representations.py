@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from tests.base import FoodgramTestCase
+
+
+class FastRepresentationTests(FoodgramTestCase):
+    """Быстрое представление даёт тот же JSON, что сериализаторы DRF.
+
+    Ответы сравниваются побайтно для анонимного пользователя, читателя
+    с аватаром, подписками, избранным и корзиной, и автора без аватара
+    и подписок. Среди рецептов есть рецепты без тегов.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.author = APIClient()
+        self.author.force_authenticate(self.authors[0])
+
+    def get_response(self, client, url, fast, ingredient_index):
+        with override_settings(FAST_SERIALIZERS=fast,
+                               INGREDIENT_INDEX=ingredient_index):
+            cache.clear()
+            response = client.get(url)
+        return response.status_code, response.content
+
+    def assertIdentical(self, client, urls, status=HTTPStatus.OK):
+        for url in urls:
+            for ingredient_index in (True, False):
+                with self.subTest(url=url, ingredient_index=ingredient_index):
+                    expected = self.get_response(client, url, False,
+                                                 ingredient_index)
+                    self.assertEqual(expected[0], status)
+                    self.assertEqual(
+                        self.get_response(client, url, True,
+                                          ingredient_index),
+                        expected
+                    )
+
+    def get_recipe_urls(self):
+        return (
+            '/api/recipes/?limit=100',
+            '/api/recipes/?limit=3&page=2',
+            '/api/recipes/?cursor=&limit=4',
+            '/api/recipes/?tags=breakfast&tags=dinner',
+            f'/api/recipes/?author={self.authors[1].pk}',
+            f'/api/recipes/{self.recipes[0].pk}/',
+            f'/api/recipes/{self.recipes[1].pk}/',
+            f'/api/recipes/{self.big_recipe.pk}/',
+        )
+
+    def get_user_urls(self):
+        return (
+            '/api/users/',
+            '/api/users/?limit=2&page=2',
+            f'/api/users/{self.authors[0].pk}/',
+            f'/api/users/{self.authors[1].pk}/',
+            f'/api/users/{self.reader.pk}/',
+        )
+
+    def test_anonymous(self):
+        self.assertIdentical(self.anonymous,
+                             self.get_recipe_urls() + self.get_user_urls())
+
+    def test_reader(self):
+        self.assertIdentical(self.client, self.get_recipe_urls() + (
+            '/api/recipes/?is_favorited=1',
+            '/api/recipes/?is_in_shopping_cart=1',
+        ) + self.get_user_urls() + (
+            '/api/users/me/',
+            '/api/users/subscriptions/',
+            '/api/users/subscriptions/?limit=2&recipes_limit=1',
+        ))
+
+    def test_author(self):
+        self.assertIdentical(self.author, (
+            '/api/recipes/?limit=100',
+            f'/api/recipes/{self.recipes[0].pk}/',
+            '/api/users/',
+            '/api/users/me/',
+            '/api/users/subscriptions/',
+        ))
+
+    def test_not_found(self):
+        self.assertIdentical(self.client, (
+            '/api/recipes/0/', '/api/recipes/abc/', '/api/users/0/',
+        ), status=HTTPStatus.NOT_FOUND)
@@ -0,0 +1,32 @@
+import os
+from http import HTTPStatus
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import override_settings
+
+from tests.base import FoodgramTestCase
+
+URL = '/api/recipes/download_shopping_cart/?type=pdf'
+
+
+class ShoppingListPDFTests(FoodgramTestCase):
+    """PDF списка покупок с кириллицей."""
+
+    @override_settings(SHOPPING_CART_PDF_FONT='/nonexistent/font.ttf')
+    def test_missing_font(self):
+        with self.assertLogs('api.shopping_list', 'ERROR'):
+            response = self.client.get(URL)
+        self.assertEqual(response.status_code,
+                         HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertFalse(response.streaming)
+        self.assertIn('type', response.json())
+
+    @skipUnless(os.path.exists(settings.SHOPPING_CART_PDF_FONT),
+                'Шрифт SHOPPING_CART_PDF_FONT не установлен.')
+    def test_pdf(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(
+            b''.join(response.streaming_content).startswith(b'%PDF')
+        )
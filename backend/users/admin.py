@@ -30,15 +30,16 @@ class UsersAdmin(UserAdmin):
                              'width="80" height="60">')
         return 'Нет аватара'
 
-    @admin.display(description='Кол-во рецептов')
+    @admin.display(description='Кол-во рецептов', ordering='recipes_count')
     def recipe_count(self, user):
         """Количество рецептов."""
-        return user.recipes.count()
+        return user.recipes_count
 
-    @admin.display(description='Кол-во подписчиков')
+    @admin.display(description='Кол-во подписчиков',
+                   ordering='subscribers_count')
     def subscriber_count(self, user):
         """Количество подписчиков."""
-        return user.subscriptions_to_author.count()
+        return user.subscribers_count
 
 
 admin.site.register(Subscribe)
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:04
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_username_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='avatars/', verbose_name='Аватар'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from core.storage import content_addressed_storage
+
 
 class User(AbstractUser):
     """Модель пользователя."""
@@ -17,9 +19,16 @@ class User(AbstractUser):
     avatar = models.ImageField(
         'Аватар',
         upload_to='avatars/',
+        storage=content_addressed_storage,
         blank=True,
         null=True
     )
+    recipes_count = models.PositiveIntegerField(
+        'Кол-во рецептов', default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Кол-во подписчиков', default=0, editable=False
+    )
 
     class Meta:
         ordering = ('username',)
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.counters import connect_counter
+from core.storage import get_stored_name, release
+from core.thumbnails import schedule_thumbnails
+from .models import Subscribe, User
+
+connect_counter(Subscribe, 'author', User, 'subscribers_count')
+
+
+def avatar_updated(update_fields):
+    return update_fields is None or 'avatar' in update_fields
+
+
+@receiver(post_save, sender=User)
+def make_avatar_thumbnails(sender, instance, update_fields, **kwargs):
+    """Построение миниатюры аватара."""
+    if avatar_updated(update_fields):
+        schedule_thumbnails(instance.avatar, ('avatar',))
+
+
+@receiver(pre_save, sender=User)
+def remember_avatar(sender, instance, update_fields, **kwargs):
+    if avatar_updated(update_fields):
+        instance.previous_avatar = get_stored_name(instance, 'avatar')
+
+
+@receiver(post_save, sender=User)
+def release_replaced_avatar(sender, instance, update_fields, **kwargs):
+    """Удаление заменённого аватара, если он больше не используется."""
+    previous = getattr(instance, 'previous_avatar', None)
+    if avatar_updated(update_fields) and previous != instance.avatar.name:
+        release(previous)
+
+
+@receiver(post_delete, sender=User)
+def release_avatar(sender, instance, **kwargs):
+    """Удаление аватара удалённого пользователя."""
+    release(instance.avatar.name)